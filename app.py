@@ -1,20 +1,34 @@
 import os
+import codecs
+import gzip
 import json
 import re
 import subprocess
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+import groq
 from groq import Groq
-from moviepy.editor import VideoFileClip
 import tempfile
+import threading
+import time
 import uuid
-import requests
-from bs4 import BeautifulSoup
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+import asyncio
+import httpx
+from html_extract import extract_page
 from urllib.parse import urlparse
-from data_store import (save_script_result, get_all_scripts, get_script_by_id, delete_script, get_stats,
-                        create_user, authenticate_user, get_user_by_id)
-import io
+from data_store import (save_script_result, get_scripts_page, iter_scripts, get_script_by_id, delete_script, get_stats,
+                        create_user, authenticate_user, get_user_by_id, clear_scripts, import_scripts, iter_json_array,
+                        new_guest_user, save_guest_user, touch_guest, start_guest_compactor, get_guest_stats,
+                        user_cache, transcript_cache, instagram_cache_key, file_cache_key)
+from jobs import JobQueue, QueueFullError
+from media import extract_audio_chunks
+from scrape_cache import ScrapeCache
+from http_client import fetch_page, run_http, get_api_client, get_pool_stats
+from single_flight import SingleFlight
 
 # Selenium removed for cloud deployment compatibility
 SELENIUM_AVAILABLE = False
@@ -56,9 +70,41 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-pro
 # Create uploads folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Background workers for /process; ffmpeg runs in child processes, so only
+# FFMPEG_WORKERS extractions are allowed at once
+job_queue = JobQueue(
+    workers=int(os.getenv('JOB_WORKERS', 4)),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', 50))
+)
+ffmpeg_slots = threading.BoundedSemaphore(int(os.getenv('FFMPEG_WORKERS', os.cpu_count() or 2)))
+
+# Whisper requests for the chunks of long videos share one bounded pool
+transcribe_pool = ThreadPoolExecutor(max_workers=int(os.getenv('TRANSCRIBE_WORKERS', 4)),
+                                     thread_name_prefix='transcribe')
+TRANSCRIPT_OVERLAP_WORDS = 30
+
+# Multi-brand rewrites (/process/brands) run at most REWRITE_WORKERS at a time
+rewrite_pool = ThreadPoolExecutor(max_workers=int(os.getenv('REWRITE_WORKERS', 4)),
+                                  thread_name_prefix='rewrite')
+MAX_BRANDS = int(os.getenv('MAX_BRANDS', 10))
+
+# Raw pages and brand summaries from /scrape-website, revalidated after the TTL
+scrape_cache = ScrapeCache(ttl=int(os.getenv('SCRAPE_CACHE_TTL', 3600)),
+                           max_bytes=int(os.getenv('SCRAPE_CACHE_MAX_MB', 50)) * 1024 * 1024)
+
+# /api/transcribe/batch: concurrent downloads and Whisper transcriptions across all batches
+BATCH_DOWNLOAD_WORKERS = int(os.getenv('BATCH_DOWNLOAD_WORKERS', 4))
+BATCH_TRANSCRIBE_WORKERS = int(os.getenv('BATCH_TRANSCRIBE_WORKERS', 4))
+BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', 200))
+batch_download_slots = threading.BoundedSemaphore(BATCH_DOWNLOAD_WORKERS)
+batch_transcribe_slots = threading.BoundedSemaphore(BATCH_TRANSCRIBE_WORKERS)
+
+# Concurrent requests for the same reel (by shortcode) share one download + transcription
+reel_flights = SingleFlight()
+
 # Initialize Groq client
 try:
-    groq_client = Groq(api_key=groq_api_key)
+    groq_client = Groq(api_key=groq_api_key, http_client=get_api_client())
 except Exception as e:
     print("\n" + "="*60)
     print("⚠️  ERROR: Failed to initialize Groq client")
@@ -80,21 +126,42 @@ def allowed_file(filename):
 
 
 def get_current_user():
-    """Get current user from session, create guest if none exists."""
+    """Get current user from session, create guest if none exists.
+    
+    New guests live only in the signed session cookie; they are written to
+    the database by get_saving_user() when they first save a script.
+    """
     user_id = session.get('user_id')
     
     if user_id:
+        # Guest that has not saved anything yet: nothing to look up
+        if session.get('is_guest') and not session.get('guest_saved'):
+            return new_guest_user(user_id, session.get('guest_created_at'))
+        
         user = get_user_by_id(user_id)
         if user:
-            return user
+            # Active stored guests must not look idle to the guest compactor
+            return touch_guest(user) if user['is_guest'] else user
     
-    # Create a guest user
-    guest_user = create_user(email='', password='', is_guest=True)
+    # Create a guest user (session only); a flag left from a previous guest whose
+    # row is gone (e.g. purged) must not stop this one from being stored
+    guest_user = new_guest_user()
     session['user_id'] = guest_user['id']
     session['is_guest'] = True
+    session['guest_created_at'] = guest_user['created_at']
+    session.pop('guest_saved', None)
     return guest_user
 
 
+def get_saving_user():
+    """Get current user, persisting a session-only guest before it saves a script."""
+    user = get_current_user()
+    if user['is_guest'] and not session.get('guest_saved'):
+        save_guest_user(user)
+        session['guest_saved'] = True
+    return user
+
+
 def require_auth(f):
     """Decorator to require authentication (guest or registered)."""
     from functools import wraps
@@ -105,29 +172,51 @@ def require_auth(f):
     return decorated_function
 
 
+INSTAGRAM_URL_PATTERNS = [
+    r'https?://(?:www\.)?instagram\.com/(?:p|reel|reels|tv)/([\w-]+)',
+    r'https?://(?:www\.)?instagram\.com/[\w.-]+/(?:p|reel|reels|tv)/([\w-]+)',
+]
+
+
 def is_instagram_url(url):
     """Check if the URL is a valid Instagram URL."""
-    instagram_patterns = [
-        r'https?://(?:www\.)?instagram\.com/(?:p|reel|tv)/[\w-]+',
-        r'https?://(?:www\.)?instagram\.com/[\w.-]+/(?:p|reel|tv)/[\w-]+',
-    ]
-    return any(re.match(pattern, url) for pattern in instagram_patterns)
+    return any(re.match(pattern, url) for pattern in INSTAGRAM_URL_PATTERNS)
+
+
+def get_instagram_shortcode(url):
+    """Return the post/reel shortcode from an Instagram URL, or None."""
+    for pattern in INSTAGRAM_URL_PATTERNS:
+        match = re.match(pattern, url.strip())
+        if match:
+            return match.group(1)
+    return None
+
 
+def download_instagram_video(url, audio_only=False):
+    """Download Instagram video using yt-dlp and return the file path.
 
-def download_instagram_video(url):
-    """Download Instagram video using yt-dlp and return the file path."""
+    With `audio_only` only the audio stream is fetched (no video download and
+    no muxing step), which is all the transcription pipeline needs.
+    """
     try:
         # Generate unique filename
         unique_id = str(uuid.uuid4())[:8]
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], f'instagram_{unique_id}.mp4')
+        if audio_only:
+            # The container depends on the stream yt-dlp picks, so let it fill in the extension
+            output_path = os.path.join(app.config['UPLOAD_FOLDER'], f'instagram_{unique_id}.%(ext)s')
+            format_selector = 'bestaudio[ext=m4a]/bestaudio/best[ext=mp4]/best'
+        else:
+            output_path = os.path.join(app.config['UPLOAD_FOLDER'], f'instagram_{unique_id}.mp4')
+            format_selector = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
         
         # Use yt-dlp to download the video
         command = [
             'yt-dlp',
-            '-f', 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+            '-f', format_selector,
             '--no-playlist',
             '--no-warnings',
             '--quiet',
+            '--print', 'after_move:filepath',
             '-o', output_path,
             url
         ]
@@ -137,8 +226,10 @@ def download_instagram_video(url):
         if result.returncode != 0:
             raise Exception(f"yt-dlp failed: {result.stderr}")
         
-        if os.path.exists(output_path):
-            return output_path
+        lines = result.stdout.strip().splitlines()
+        downloaded_path = lines[-1].strip() if lines else output_path
+        if os.path.exists(downloaded_path):
+            return downloaded_path
         else:
             raise Exception("Video file was not created")
     
@@ -169,23 +260,50 @@ def normalize_url(url):
     return url
 
 
-def try_fetch_about_page(base_url, headers):
-    """Try to fetch common 'about' pages that might have more static content."""
-    import requests
+ABOUT_PATHS = ['/about', '/about-us', '/about.html', '/company', '/who-we-are']
+ABOUT_PROBE_DEADLINE = float(os.getenv('ABOUT_PROBE_DEADLINE', 8))
+
+
+async def try_fetch_about_page(base_url, headers, deadline=ABOUT_PROBE_DEADLINE):
+    """Try to fetch common 'about' pages that might have more static content.
+
+    All paths are probed concurrently within `deadline` seconds. The result
+    follows the order of ABOUT_PATHS rather than arrival order: a good page is
+    returned once every higher-ranked probe has finished, and the remaining
+    probes are cancelled.
+    """
     from urllib.parse import urljoin
     
-    about_paths = ['/about', '/about-us', '/about.html', '/company', '/who-we-are']
+    async def probe(path):
+        response = await fetch_page(urljoin(base_url, path), headers, timeout=deadline, deadline=deadline)
+        if response.status_code == 200 and len(response.text) > 500:
+            return response
+        return None
     
-    for path in about_paths:
-        try:
-            about_url = urljoin(base_url, path)
-            response = requests.get(about_url, headers=headers, timeout=10, allow_redirects=True)
-            if response.status_code == 200 and len(response.text) > 500:
-                return response
-        except:
-            continue
+    ranks = {asyncio.ensure_future(probe(path)): rank for rank, path in enumerate(ABOUT_PATHS)}
+    pending = set(ranks)
+    best_rank, best_response = None, None
+    give_up_at = time.time() + deadline
+    try:
+        while pending:
+            if best_rank is not None and all(ranks[task] > best_rank for task in pending):
+                break
+            remaining = give_up_at - time.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    continue
+                response = task.result()
+                if response is not None and (best_rank is None or ranks[task] < best_rank):
+                    best_rank, best_response = ranks[task], response
+    finally:
+        # Unfinished probes are cancelled mid-request
+        for task in pending:
+            task.cancel()
     
-    return None
+    return best_response
 
 
 def scrape_with_selenium(url):
@@ -245,50 +363,39 @@ def scrape_with_selenium(url):
                 pass
 
 
-def scrape_website_with_js_wait(url, headers):
-    """Try to scrape with a small delay to allow some JS to execute."""
-    import time
-    session = requests.Session()
-    session.headers.update(headers)
-    
+async def scrape_website_with_js_wait(url, headers):
+    """Try to scrape with a small delay to allow some JS to execute.
+
+    Returns a FetchedPage: at most SCRAPE_MAX_BYTES of the body, already decoded.
+    """
     # Make multiple requests with delays
     for attempt in range(2):
-        response = session.get(url, timeout=20, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Fix encoding issues - try to detect and set correct encoding
-        # Check content type to ensure it's HTML
-        content_type = response.headers.get('Content-Type', '').lower()
-        
-        # If it's not HTML, skip encoding fixes
-        if 'text/html' in content_type or 'text/plain' in content_type or not content_type:
-            # Try to get encoding from content-type header first
-            if 'charset=' in content_type:
-                try:
-                    charset = content_type.split('charset=')[-1].split(';')[0].strip()
-                    response.encoding = charset
-                except:
-                    pass
-            elif response.encoding is None or response.encoding == 'ISO-8859-1':
-                # Try to detect encoding from content
-                response.encoding = response.apparent_encoding
+        page = await fetch_page(url, headers, timeout=20)
+        if page.status_code == 304:
+            # Conditional request: the cached copy is still current
+            return page
         
         # Check if content seems loaded and is actually text (not binary garbage)
-        try:
-            text_content = response.text
-            # Check if content looks like valid HTML/text (not binary)
-            if len(text_content) > 1000:
-                # Quick check: if more than 20% of chars are replacement chars, it's likely binary
-                replacement_chars = text_content.count('�') + text_content.count('\ufffd')
-                if replacement_chars < len(text_content) * 0.1:  # Less than 10% garbled
-                    return response
-        except:
-            pass
+        if page.truncated or len(page.text) > 1000:
+            return page
         
         if attempt < 1:
-            time.sleep(2)  # Wait before retry
+            await asyncio.sleep(2)  # Wait before retry without holding a thread
     
-    return response
+    return page
+
+
+async def fetch_website(url, headers):
+    """Fetch `url`, falling back from HTTPS to HTTP if the secure connection fails."""
+    try:
+        return await scrape_website_with_js_wait(url, headers)
+    except httpx.ConnectError as e:
+        if not url.startswith('https://'):
+            raise
+        try:
+            return await scrape_website_with_js_wait(url.replace('https://', 'http://', 1), headers)
+        except Exception:
+            raise e  # Raise original error if HTTP also fails
 
 
 def scrape_website_content(url):
@@ -312,7 +419,6 @@ def scrape_website_content(url):
             'Accept-Language': 'en-US,en;q=0.9',
             'Accept-Encoding': accept_encoding,
             'DNT': '1',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
@@ -324,218 +430,83 @@ def scrape_website_content(url):
             'sec-ch-ua-platform': '"Windows"'
         }
         
-        # Try HTTPS first, fallback to HTTP if needed
-        response = None
-        try:
-            response = scrape_website_with_js_wait(url, headers)
-        except (requests.exceptions.SSLError, requests.exceptions.ConnectionError) as e:
-            # If HTTPS fails, try HTTP
-            if url.startswith('https://'):
-                url_http = url.replace('https://', 'http://')
-                try:
-                    response = scrape_website_with_js_wait(url_http, headers)
-                except Exception:
-                    raise e  # Raise original error if HTTP also fails
-        
-        # Parse HTML - use response.text for proper encoding handling
-        # If encoding detection failed, try common encodings
-        try:
-            html_text = response.text
-        except UnicodeDecodeError:
-            # Fallback: try decoding with different encodings
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    html_text = response.content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                # Last resort: decode with errors ignored
-                html_text = response.content.decode('utf-8', errors='ignore')
-        
-        # Check if content is garbled (binary/compressed not properly decoded)
-        # Count replacement characters and other signs of binary content
-        garbled_chars = html_text.count('�') + html_text.count('\ufffd') + html_text.count('\x00')
-        is_garbled = garbled_chars > len(html_text) * 0.05  # More than 5% garbled
-        
-        # If content looks garbled, try Selenium immediately
-        if is_garbled and SELENIUM_AVAILABLE:
-            print(f"Content appears garbled ({garbled_chars} bad chars), trying Selenium...")
-            rendered_html = scrape_with_selenium(url)
-            if rendered_html:
-                # Check if Selenium result is better
-                selenium_garbled = rendered_html.count('�') + rendered_html.count('\ufffd')
-                if selenium_garbled < garbled_chars:
+        # Repeat scrapes: fresh cache entries are served without a request,
+        # stale ones are revalidated with a conditional GET
+        cached = scrape_cache.get(url)
+        if cached and cached['is_fresh']:
+            scrape_cache.count('fresh_hits')
+            return cached['summary']
+        request_headers = dict(headers, **ScrapeCache.conditional_headers(cached)) if cached else headers
+        
+        # Try HTTPS first, fallback to HTTP if needed (network I/O runs on the shared HTTP loop)
+        response = run_http(fetch_website(url, request_headers))
+        
+        if cached and response.status_code == 304:
+            scrape_cache.revalidated(url, cached, response)
+            return cached['summary']
+        scrape_cache.count('misses')
+        
+        # Bounded prefix of the body, decoded with the encoding sniffed from its first chunk
+        html_text = response.text
+        if response.truncated:
+            print(f"Page truncated at {response.bytes_read} bytes")
+        
+        # Binary bodies were already rejected from their first chunk; a page that
+        # decoded badly (> 5% replacement characters) can still be re-rendered
+        if SELENIUM_AVAILABLE:
+            garbled_chars = html_text.count('\ufffd') + html_text.count('\x00')
+            if garbled_chars > len(html_text) * 0.05:
+                print(f"Content appears garbled ({garbled_chars} bad chars), trying Selenium...")
+                rendered_html = scrape_with_selenium(url)
+                # Keep the Selenium result if it is better
+                if rendered_html and rendered_html.count('\ufffd') < garbled_chars:
                     html_text = rendered_html
-                    is_garbled = False
         
-        soup = BeautifulSoup(html_text, 'html.parser')
+        # Single pass over the page collects everything the summary needs
+        page = extract_page(html_text)
         
         # Initialize extracted data
         extracted_data = {}
         
         # If content is minimal, try to fetch an 'about' page
-        initial_text_length = len(soup.get_text(strip=True))
-        if initial_text_length < 500:
-            about_response = try_fetch_about_page(url, headers)
+        if page['text_length'] < 500:
+            about_response = run_http(try_fetch_about_page(url, headers))
             if about_response:
-                # Fix encoding for about page too
-                if about_response.encoding is None or about_response.encoding == 'ISO-8859-1':
-                    about_response.encoding = about_response.apparent_encoding
-                try:
-                    about_html = about_response.text
-                except UnicodeDecodeError:
-                    about_html = about_response.content.decode('utf-8', errors='ignore')
-                soup = BeautifulSoup(about_html, 'html.parser')
+                page = extract_page(about_response.text)
                 extracted_data['fetched_from'] = 'about_page'
         
-        # Check if this is a JavaScript-heavy site (React, Vue, etc.)
-        # Look for common SPA indicators
-        is_spa = False
-        body_text = soup.get_text(strip=True)
-        
-        # Detect SPA frameworks
-        scripts = soup.find_all('script')
-        for script in scripts:
-            script_content = str(script)
-            if any(framework in script_content.lower() for framework in ['react', 'vue', 'angular', 'next.js', 'nuxt']):
-                is_spa = True
-                break
-        
-        # Also check if body is nearly empty (common in SPAs before JS loads)
-        if len(body_text) < 200:
-            is_spa = True
-        
+        # JavaScript-heavy site (React, Vue, etc.) or a nearly empty body
+        is_spa = page['is_spa']
         extracted_data['is_spa'] = is_spa
         
         # If SPA detected and content is minimal, try Selenium for JS rendering
-        if is_spa and len(body_text) < 500 and SELENIUM_AVAILABLE:
+        if is_spa and page['text_length'] < 500 and SELENIUM_AVAILABLE:
             print(f"SPA detected, attempting JavaScript rendering with Selenium...")
             rendered_html = scrape_with_selenium(url)
-            if rendered_html and len(rendered_html) > len(response.text):
-                soup = BeautifulSoup(rendered_html, 'html.parser')
-                body_text = soup.get_text(strip=True)
+            if rendered_html and len(rendered_html) > len(html_text):
+                page = extract_page(rendered_html)
                 extracted_data['rendered_with_js'] = True
-                print(f"Successfully rendered JS content: {len(body_text)} chars")
-        
-        # 1. Extract title (multiple methods)
-        title = None
-        if soup.title:
-            title = soup.title.string
-        if not title:
-            title = soup.find('meta', property='og:title')
-            if title:
-                title = title.get('content')
-        if not title:
-            h1 = soup.find('h1')
-            if h1:
-                title = h1.get_text(strip=True)
-        extracted_data['title'] = title or "Unknown Website"
-        
-        # 2. Extract meta description (multiple sources)
-        meta_desc = None
-        meta_tag = soup.find('meta', attrs={'name': 'description'})
-        if meta_tag:
-            meta_desc = meta_tag.get('content')
-        if not meta_desc:
-            og_desc = soup.find('meta', property='og:description')
-            if og_desc:
-                meta_desc = og_desc.get('content')
-        if not meta_desc:
-            twitter_desc = soup.find('meta', attrs={'name': 'twitter:description'})
-            if twitter_desc:
-                meta_desc = twitter_desc.get('content')
-        extracted_data['description'] = meta_desc
-        
-        # 3. Extract keywords
-        keywords = soup.find('meta', attrs={'name': 'keywords'})
-        if keywords:
-            extracted_data['keywords'] = keywords.get('content')
-        
-        # 4. Extract Open Graph data
-        og_type = soup.find('meta', property='og:type')
-        if og_type:
-            extracted_data['type'] = og_type.get('content')
-        
-        og_site_name = soup.find('meta', property='og:site_name')
-        if og_site_name:
-            extracted_data['site_name'] = og_site_name.get('content')
-        
-        # 5. Extract main content with priority
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 
-                            'iframe', 'noscript', 'form', 'button']):
-            element.decompose()
-        
-        # Try to find main content areas (priority order)
-        main_content = None
-        content_selectors = [
-            ('main', {}),
-            ('article', {}),
-            ('div', {'class': ['content', 'main-content', 'post-content', 'entry-content', 'article-content']}),
-            ('div', {'id': ['content', 'main-content', 'main', 'primary']}),
-            ('section', {'class': ['content', 'main']}),
-        ]
+                print(f"Successfully rendered JS content: {page['text_length']} chars")
         
-        for tag, attrs in content_selectors:
-            if attrs:
-                for attr_key, attr_values in attrs.items():
-                    for attr_value in attr_values:
-                        element = soup.find(tag, {attr_key: lambda x: x and attr_value in x.lower()})
-                        if element:
-                            main_content = element
-                            break
-                    if main_content:
-                        break
-            else:
-                main_content = soup.find(tag)
-            if main_content:
-                break
+        # 1-4. Title, description, keywords and Open Graph data
+        extracted_data['title'] = page['title'] or "Unknown Website"
+        extracted_data['description'] = page['description']
+        for key in ('keywords', 'type', 'site_name'):
+            if page[key]:
+                extracted_data[key] = page[key]
         
-        # Fallback to body if no main content found
-        if not main_content:
-            main_content = soup.find('body')
+        # 5. Main content: best-scoring text blocks outside nav/header/footer
+        content_text = page['content']
+        if content_text and len(content_text) > 50:
+            extracted_data['content'] = content_text
         
-        # Extract text from main content
-        if main_content:
-            # Get all paragraphs
-            paragraphs = main_content.find_all('p')
-            content_text = ' '.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
-            
-            # If no paragraphs, try list items
-            if not content_text or len(content_text) < 100:
-                list_items = main_content.find_all(['li', 'div'])
-                content_text += ' ' + ' '.join([item.get_text(strip=True) for item in list_items[:20] if item.get_text(strip=True)])
-            
-            # If still no content, get all text
-            if not content_text or len(content_text) < 100:
-                content_text = main_content.get_text(separator=' ', strip=True)
-            
-            # Clean up whitespace
-            content_text = ' '.join(content_text.split())
-            if content_text and len(content_text) > 50:
-                extracted_data['content'] = content_text[:2000]  # Limit to 2000 chars
-        
-        # 6. Extract headings for structure
-        headings = []
-        for h_tag in ['h1', 'h2', 'h3']:
-            for heading in soup.find_all(h_tag, limit=5):
-                heading_text = heading.get_text(strip=True)
-                if heading_text and len(heading_text) > 3:
-                    headings.append(heading_text)
-        if headings:
-            extracted_data['headings'] = headings[:5]
-        
-        # 7. Extract company/brand information
-        # Look for about, company info
-        about_keywords = ['about', 'company', 'who we are', 'our story', 'mission']
-        about_content = []
-        for p in soup.find_all('p', limit=50):
-            p_text = p.get_text(strip=True).lower()
-            if any(keyword in p_text for keyword in about_keywords):
-                about_content.append(p.get_text(strip=True))
-        if about_content:
-            extracted_data['about'] = ' '.join(about_content[:3])
+        # 6. Headings for structure
+        if page['headings']:
+            extracted_data['headings'] = page['headings']
+        
+        # 7. Company/brand information
+        if page['about']:
+            extracted_data['about'] = page['about']
         
         # Format the output
         output_parts = []
@@ -597,14 +568,8 @@ def scrape_website_content(url):
             if is_spa:
                 fallback_parts.append("\n⚡ Note: This appears to be a modern web app (React/Vue/Angular)")
             
-            # Extract all meta tags as fallback
-            all_meta = soup.find_all('meta')
-            meta_info = {}
-            for meta in all_meta:
-                if meta.get('name') and meta.get('content'):
-                    meta_info[meta.get('name')] = meta.get('content')
-                elif meta.get('property') and meta.get('content'):
-                    meta_info[meta.get('property')] = meta.get('content')
+            # Fall back to every meta tag on the page
+            meta_info = page['meta']
             
             # Add useful meta information
             if 'description' in meta_info or 'og:description' in meta_info:
@@ -618,55 +583,26 @@ def scrape_website_content(url):
                 fallback_parts.append(f"\n🏢 Site: {meta_info['og:site_name']}")
             
             # Try to extract any visible text (even if minimal)
-            body = soup.find('body')
-            if body:
-                # Make a copy to manipulate
-                body_copy = soup.find('body')
-                
-                # Remove all script and style tags
-                for element in body_copy(['script', 'style', 'noscript']):
-                    element.decompose()
-                
-                # Try to find any divs with substantial text content
-                divs_with_content = []
-                for div in body_copy.find_all(['div', 'section', 'article', 'p', 'span']):
-                    text = div.get_text(strip=True)
-                    if text and len(text) > 50 and not text.startswith('JavaScript'):
-                        divs_with_content.append(text)
-                
-                if divs_with_content:
-                    combined_text = ' '.join(divs_with_content[:10])
-                    combined_text = ' '.join(combined_text.split())[:1000]
-                    if combined_text and len(combined_text) > 50:
-                        fallback_parts.append(f"\n📄 Available Content:\n{combined_text}")
-                else:
-                    visible_text = body_copy.get_text(separator=' ', strip=True)
-                    visible_text = ' '.join(visible_text.split())
-                    
-                    if visible_text and len(visible_text) > 20:
-                        fallback_parts.append(f"\n📄 Available Content:\n{visible_text[:1000]}")
+            if page['text_blocks']:
+                combined_text = ' '.join(page['text_blocks'][:10])[:1000]
+                fallback_parts.append(f"\n📄 Available Content:\n{combined_text}")
+            elif len(page['visible_text']) > 20:
+                fallback_parts.append(f"\n📄 Available Content:\n{page['visible_text'][:1000]}")
             
             # Extract JSON-LD structured data if available (common in modern sites)
-            json_ld_scripts = soup.find_all('script', type='application/ld+json')
-            for script in json_ld_scripts:
-                try:
-                    import json as json_lib
-                    data = json_lib.loads(script.string)
-                    if isinstance(data, dict):
-                        if data.get('description'):
-                            fallback_parts.append(f"\n📋 Additional Info:\n{data['description'][:500]}")
-                        if data.get('@type'):
-                            fallback_parts.append(f"\n🔖 Type: {data['@type']}")
-                        break
-                except:
-                    pass
+            for data in page['json_ld']:
+                if isinstance(data, dict):
+                    if isinstance(data.get('description'), str) and data['description']:
+                        fallback_parts.append(f"\n📋 Additional Info:\n{data['description'][:500]}")
+                    if data.get('@type'):
+                        fallback_parts.append(f"\n🔖 Type: {data['@type']}")
+                    break
             
             result = "\n".join(fallback_parts)
             
             # Final fallback - if still too short, get raw text
             if len(result) < 100:
-                body_text = soup.get_text(separator=' ', strip=True)
-                body_text = ' '.join(body_text.split())[:1500]
+                body_text = page['visible_text'][:1500]
                 result = f"🌐 Website: {extracted_data['title']}\n\n📄 Content:\n{body_text if body_text else 'Unable to extract detailed content. This may be a dynamically-loaded website.'}"
         
         # Ultimate fallback for JavaScript-heavy sites with minimal content
@@ -676,37 +612,17 @@ def scrape_website_content(url):
                 print(f"Content too short, attempting Selenium as last resort...")
                 rendered_html = scrape_with_selenium(url)
                 if rendered_html:
-                    soup = BeautifulSoup(rendered_html, 'html.parser')
+                    rendered = extract_page(rendered_html)
+                    title = rendered['title'] or extracted_data.get('title', 'Unknown Website')
+                    meta_desc = rendered['description']
+                    body_text = rendered['visible_text'][:1500]
                     
-                    # Remove scripts and styles
-                    for element in soup(['script', 'style', 'noscript']):
-                        element.decompose()
-                    
-                    # Get title
-                    title = soup.title.string if soup.title else extracted_data.get('title', 'Unknown Website')
-                    
-                    # Get meta description
-                    meta_desc = None
-                    meta_tag = soup.find('meta', attrs={'name': 'description'})
-                    if meta_tag:
-                        meta_desc = meta_tag.get('content')
-                    if not meta_desc:
-                        og_desc = soup.find('meta', property='og:description')
-                        if og_desc:
-                            meta_desc = og_desc.get('content')
-                    
-                    # Get body text
-                    body = soup.find('body')
-                    if body:
-                        body_text = body.get_text(separator=' ', strip=True)
-                        body_text = ' '.join(body_text.split())[:1500]
-                        
-                        if len(body_text) > 100:
-                            result = f"🌐 Website: {title}\n"
-                            result += f"⚡ Rendered with JavaScript support\n"
-                            if meta_desc:
-                                result += f"\n📝 Description:\n{meta_desc}\n"
-                            result += f"\n📄 Content:\n{body_text}"
+                    if len(body_text) > 100:
+                        result = f"🌐 Website: {title}\n"
+                        result += f"⚡ Rendered with JavaScript support\n"
+                        if meta_desc:
+                            result += f"\n📝 Description:\n{meta_desc}\n"
+                        result += f"\n📄 Content:\n{body_text}"
             
             # If still too short, provide domain-based fallback
             if len(result) < 150:
@@ -761,64 +677,177 @@ def scrape_website_content(url):
                 
                 result = fallback_result
         
+        if response.status_code == 200:
+            scrape_cache.put(url, response, html_text, result)
         return result
     
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise Exception("Website took too long to respond. Please try again.")
-    except requests.exceptions.SSLError:
-        raise Exception("SSL certificate error. The website may not be secure.")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError as e:
+        if 'SSL' in str(e) or 'CERTIFICATE' in str(e):
+            raise Exception("SSL certificate error. The website may not be secure.")
         raise Exception("Could not connect to website. Please check the URL.")
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 403:
             raise Exception("Access denied (403). This website blocks automated scraping. Please manually describe your brand instead.")
         elif e.response.status_code == 404:
             raise Exception("Page not found (404). Please check the URL.")
         else:
             raise Exception(f"HTTP Error {e.response.status_code}: {str(e)}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Failed to fetch website: {str(e)}")
     except Exception as e:
         raise Exception(f"Error scraping website: {str(e)}")
 
 
-def extract_audio(video_path):
-    """Extract audio from video file and return audio file path."""
-    try:
-        # Create a temporary file for the audio
-        audio_path = video_path.rsplit('.', 1)[0] + '.mp3'
-        
-        # Load video and extract audio
-        video = VideoFileClip(video_path)
-        video.audio.write_audiofile(audio_path, logger=None)
-        video.close()
-        
-        return audio_path
-    except Exception as e:
-        raise Exception(f"Error extracting audio: {str(e)}")
-
+def transcribe_audio(audio):
+    """Transcribe audio using Groq Whisper API.
 
-def transcribe_audio(audio_path):
-    """Transcribe audio using Groq Whisper API."""
+    `audio` is either a file path or the (filename, bytes) tuple returned by extract_audio.
+    """
     try:
-        with open(audio_path, 'rb') as audio_file:
-            transcription = groq_client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-large-v3",
-                response_format="json",
-                language="en",
-                temperature=0.0
-            )
+        if isinstance(audio, str):
+            with open(audio, 'rb') as audio_file:
+                audio = (os.path.basename(audio), audio_file.read())
+        transcription = groq_client.audio.transcriptions.create(
+            file=audio,
+            model="whisper-large-v3",
+            response_format="json",
+            language="en",
+            temperature=0.0
+        )
         return transcription.text
     except Exception as e:
         raise Exception(f"Error transcribing audio: {str(e)}")
 
 
-def analyze_and_rewrite_script(transcription, brand_input):
-    """Use Groq LLM to analyze video style and rewrite script."""
-    try:
-        # First, analyze the style
-        style_prompt = f"""Analyze the following video transcription and identify its style characteristics:
+def _normalize_words(words):
+    """Lowercase words and strip punctuation, for matching chunk overlaps."""
+    return [re.sub(r"[^\w']", '', word.lower()) for word in words]
+
+
+def _find_overlap(tail, head, edge_words):
+    """Find the longest run of words that ends `tail` and starts `head`.
+
+    Up to `edge_words` words on either side of the run may differ (words cut
+    off at the chunk edge). Returns (words to drop from the end of tail,
+    words to skip at the start of head), or None.
+    """
+    for size in range(min(len(tail), len(head)), 1, -1):
+        for tail_skip in range(min(edge_words, len(tail) - size) + 1):
+            run = tail[len(tail) - tail_skip - size:len(tail) - tail_skip]
+            for head_skip in range(edge_words + 1):
+                if head[head_skip:head_skip + size] == run:
+                    return tail_skip, head_skip + size
+    return None
+
+
+def merge_transcripts(texts, max_overlap_words=TRANSCRIPT_OVERLAP_WORDS, edge_words=2):
+    """Join transcripts of overlapping audio chunks, keeping the words they share only once."""
+    words = []
+    for text in texts:
+        next_words = text.split()
+        if words and next_words:
+            overlap = _find_overlap(_normalize_words(words[-max_overlap_words:]),
+                                    _normalize_words(next_words[:max_overlap_words]), edge_words)
+            if overlap:
+                drop, skip = overlap
+                del words[len(words) - drop:]
+                next_words = next_words[skip:]
+        words.extend(next_words)
+    return ' '.join(words)
+
+
+def transcribe_chunks(chunks):
+    """Transcribe (filename, bytes) chunks concurrently and merge the results in order."""
+    if len(chunks) == 1:
+        return transcribe_audio(chunks[0])
+    texts = list(transcribe_pool.map(transcribe_audio, chunks))
+    return merge_transcripts(texts)
+
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+
+# Ask for the style analysis and the rewrite in one structured JSON call
+# instead of two sequential calls (falls back to two calls if parsing fails)
+ONE_SHOT_REWRITE = os.getenv('ONE_SHOT_REWRITE', 'false').lower() == 'true'
+
+_llm_lock = threading.Lock()
+llm_usage = {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+             'one_shot': 0, 'one_shot_fallbacks': 0,
+             'streams': 0, 'first_token_seconds': 0.0, 'stream_seconds': 0.0}
+
+
+def _count_llm(**amounts):
+    with _llm_lock:
+        for key, amount in amounts.items():
+            llm_usage[key] += amount
+
+
+def get_llm_usage():
+    with _llm_lock:
+        return dict(llm_usage)
+
+
+def chat_completion(prompt, temperature, max_tokens, on_token=None, **kwargs):
+    """Run a single-message chat completion and record its token usage.
+
+    With `on_token` the completion is streamed and every text delta is passed
+    to it as it arrives; the full text is still returned at the end.
+    """
+    if on_token is not None:
+        return _stream_completion(prompt, temperature, max_tokens, on_token, **kwargs)
+    
+    response = groq_client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **kwargs
+    )
+    usage = getattr(response, 'usage', None)
+    _count_llm(calls=1,
+               prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+               completion_tokens=getattr(usage, 'completion_tokens', 0) or 0)
+    return response.choices[0].message.content
+
+
+def _stream_completion(prompt, temperature, max_tokens, on_token, **kwargs):
+    started = time.time()
+    first_token = None
+    usage = None
+    parts = []
+    stream = groq_client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        **kwargs
+    )
+    for chunk in stream:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            if first_token is None:
+                first_token = time.time() - started
+            parts.append(text)
+            on_token(text)
+        # Groq reports token usage on the last chunk
+        x_groq = getattr(chunk, 'x_groq', None)
+        if x_groq is not None and getattr(x_groq, 'usage', None):
+            usage = x_groq.usage
+    
+    _count_llm(calls=1, streams=1,
+               prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+               completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+               first_token_seconds=round(first_token or 0.0, 3),
+               stream_seconds=round(time.time() - started, 3))
+    return ''.join(parts)
+
+
+def analyze_style(transcription, on_token=None):
+    """Use Groq LLM to analyze the style of a video transcription."""
+    style_prompt = f"""Analyze the following video transcription and identify its style characteristics:
 
 Transcription:
 {transcription}
@@ -831,17 +860,12 @@ Provide a concise analysis covering:
 
 Keep your analysis brief and actionable (3-4 sentences)."""
 
-        style_response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": style_prompt}],
-            temperature=0.3,
-            max_tokens=500
-        )
-        
-        style_analysis = style_response.choices[0].message.content
-        
-        # Now, rewrite the script
-        rewrite_prompt = f"""You are a script writer specializing in social media content.
+    return chat_completion(style_prompt, temperature=0.3, max_tokens=500, on_token=on_token)
+
+
+def rewrite_script(transcription, style_analysis, brand_input, on_token=None):
+    """Use Groq LLM to rewrite a transcription for a brand, keeping its style."""
+    rewrite_prompt = f"""You are a script writer specializing in social media content.
 
 Original Transcription:
 {transcription}
@@ -861,14 +885,75 @@ Task: Rewrite the script to maintain the EXACT same style, tone, pacing, and for
 
 Provide ONLY the rewritten script, without any explanations or meta-commentary."""
 
-        rewrite_response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": rewrite_prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
+    return chat_completion(rewrite_prompt, temperature=0.7, max_tokens=2000, on_token=on_token)
+
+
+def analyze_and_rewrite_one_shot(transcription, brand_input):
+    """Analyze the style and rewrite the script in a single JSON-mode LLM call."""
+    prompt = f"""You are a script writer specializing in social media content.
+
+Original Transcription:
+{transcription}
+
+Brand/Company Information:
+{brand_input}
+
+Task:
+1. Analyze the original's style: tone, pacing, format and key stylistic elements (3-4 sentences, brief and actionable).
+2. Rewrite the script to maintain the EXACT same style, tone, pacing, and format as the original, but customize the content to promote the brand/company provided above. The rewritten script should match the original's speaking style and energy, follow the same structure, be ready to use as a natural, conversational video script, and be approximately the same length as the original.
+
+Respond with a JSON object with exactly two string fields:
+{{"style_analysis": "...", "rewritten_script": "..."}}
+The rewritten_script must contain ONLY the script, without explanations or meta-commentary."""
+
+    content = chat_completion(prompt, temperature=0.6, max_tokens=2500,
+                              response_format={"type": "json_object"})
+    data = json.loads(content)
+    style_analysis = data.get('style_analysis')
+    rewritten_script = data.get('rewritten_script')
+    if not isinstance(style_analysis, str) or not isinstance(rewritten_script, str) or not rewritten_script.strip():
+        raise ValueError("Structured response is missing style_analysis or rewritten_script")
+    return {
+        'style_analysis': style_analysis.strip(),
+        'rewritten_script': rewritten_script.strip()
+    }
+
+
+def _is_json_validate_failed(error):
+    """True for Groq's 400 when a JSON-mode response is not a valid object."""
+    body = getattr(error, 'body', None)
+    if isinstance(body, dict):
+        body = body.get('error', body)
+    return isinstance(body, dict) and body.get('code') == 'json_validate_failed'
+
+
+def analyze_and_rewrite_script(transcription, brand_input, one_shot=None):
+    """Use Groq LLM to analyze video style and rewrite script.
+
+    With `one_shot` (default: ONE_SHOT_REWRITE) both parts come from a single
+    structured call; if that response can't be parsed, the two-call path runs.
+    """
+    if one_shot is None:
+        one_shot = ONE_SHOT_REWRITE
+    try:
+        if one_shot:
+            try:
+                result = analyze_and_rewrite_one_shot(transcription, brand_input)
+                _count_llm(one_shot=1)
+                return result
+            except (ValueError, groq.BadRequestError) as e:
+                # json.JSONDecodeError is a ValueError too; JSON mode rejects invalid or
+                # truncated objects server-side with a 400 json_validate_failed
+                if isinstance(e, groq.BadRequestError) and not _is_json_validate_failed(e):
+                    raise
+                print(f"One-shot rewrite failed, using two calls: {str(e)}")
+                _count_llm(one_shot_fallbacks=1)
         
-        rewritten_script = rewrite_response.choices[0].message.content
+        # First, analyze the style
+        style_analysis = analyze_style(transcription)
+        
+        # Now, rewrite the script
+        rewritten_script = rewrite_script(transcription, style_analysis, brand_input)
         
         return {
             'style_analysis': style_analysis,
@@ -878,6 +963,194 @@ Provide ONLY the rewritten script, without any explanations or meta-commentary."
         raise Exception(f"Error analyzing/rewriting script: {str(e)}")
 
 
+def _token_emitter(job, field):
+    """Callback that publishes streamed LLM text for `field` as job 'token' events."""
+    return lambda text: job.emit('token', {'field': field, 'text': text})
+
+
+def _no_stage(name):
+    return nullcontext()
+
+
+def transcribe_instagram_reel(instagram_url, stage=_no_stage, download_slots=nullcontext(),
+                              transcribe_slots=nullcontext()):
+    """Download, extract and transcribe one reel, going through the transcription cache.
+
+    Concurrent calls for the same shortcode (from /process, /api/transcribe
+    or a batch) are coalesced: one download and Whisper run, shared by all.
+    `stage(name)` wraps each step; waiting callers spend that time in the
+    'transcribe' stage. The slots bound downloads and transcriptions.
+    Returns (transcription, cached).
+    """
+    cache_key = instagram_cache_key(get_instagram_shortcode(instagram_url))
+    transcription = transcript_cache.get(cache_key)
+    if transcription is not None:
+        return transcription, True
+    
+    def run():
+        # A run that finished after the check above has already filled the cache
+        # (not counted again: this request's miss was recorded above)
+        transcription = transcript_cache.get(cache_key, count=False)
+        if transcription is not None:
+            return transcription, True
+        
+        video_path = None
+        try:
+            with stage('download'), download_slots:
+                video_path = download_instagram_video(instagram_url, audio_only=True)
+            with stage('extract_audio'), ffmpeg_slots:
+                chunks = extract_audio_chunks(video_path)
+        finally:
+            # The video is no longer needed once the audio is extracted
+            if video_path and os.path.exists(video_path):
+                os.remove(video_path)
+        
+        with stage('transcribe'), transcribe_slots:
+            transcription = transcribe_chunks(chunks)
+        transcript_cache.put(cache_key, transcription)
+        return transcription, False
+    
+    if cache_key is None:
+        # No shortcode to coalesce on
+        return run()
+    (transcription, cached), _ = reel_flights.do(cache_key, run, waiting=lambda: stage('transcribe'))
+    return transcription, cached
+
+
+def get_video_transcription(job, video_path, instagram_url):
+    """Download (if needed), extract audio and transcribe, going through the transcription cache.
+
+    The video file is removed once its audio has been extracted.
+    """
+    if instagram_url:
+        return transcribe_instagram_reel(instagram_url, stage=job.stage)[0]
+    
+    try:
+        # Uploads are keyed by content hash
+        cache_key = file_cache_key(video_path)
+        transcription = transcript_cache.get(cache_key)
+        
+        if transcription is None:
+            # Step 1: Extract audio (kept in memory, no temp file; long videos are chunked)
+            with job.stage('extract_audio'), ffmpeg_slots:
+                chunks = extract_audio_chunks(video_path)
+    finally:
+        # The video is no longer needed once the audio is extracted
+        if video_path and os.path.exists(video_path):
+            os.remove(video_path)
+    
+    # Step 2: Transcribe audio
+    if transcription is None:
+        with job.stage('transcribe'):
+            transcription = transcribe_chunks(chunks)
+        transcript_cache.put(cache_key, transcription)
+    return transcription
+
+
+def run_video_job(job, video_path, instagram_url, source_name, process_mode, brand_input, user_id):
+    """Run the /process pipeline for a queued job and return the response payload."""
+    transcription = get_video_transcription(job, video_path, instagram_url)
+    
+    script_data = {
+        'source_type': 'instagram' if instagram_url else 'upload',
+        'source': instagram_url or source_name,
+        'brand_input': '',
+        'transcription': transcription,
+        'style_analysis': '',
+        'rewritten_script': ''
+    }
+    
+    # If transcription-only mode, return just the transcription
+    if process_mode == 'transcription':
+        with job.stage('save'):
+            script_id = save_script_result(script_data, user_id)
+        
+        return {
+            'success': True,
+            'mode': 'transcription',
+            'script_id': script_id,
+            'transcription': transcription
+        }
+    
+    # Full process: Step 3: Analyze and rewrite script
+    job.emit('transcription', {'text': transcription})
+    if ONE_SHOT_REWRITE:
+        # The structured response is JSON, so it is not streamed
+        with job.stage('analyze_rewrite'):
+            script_data.update(analyze_and_rewrite_script(transcription, brand_input, one_shot=True))
+    else:
+        try:
+            # Tokens are relayed to /api/jobs/<job_id>/events as they arrive
+            with job.stage('analyze'):
+                script_data['style_analysis'] = analyze_style(
+                    transcription, on_token=_token_emitter(job, 'style_analysis'))
+            with job.stage('rewrite'):
+                script_data['rewritten_script'] = rewrite_script(
+                    transcription, script_data['style_analysis'], brand_input,
+                    on_token=_token_emitter(job, 'rewritten_script'))
+        except Exception as e:
+            raise Exception(f"Error analyzing/rewriting script: {str(e)}")
+    
+    # Save to history
+    script_data['brand_input'] = brand_input
+    with job.stage('save'):
+        script_id = save_script_result(script_data, user_id)
+    
+    return {
+        'success': True,
+        'mode': 'full',
+        'script_id': script_id,
+        'transcription': transcription,
+        'style_analysis': script_data['style_analysis'],
+        'rewritten_script': script_data['rewritten_script']
+    }
+
+
+def run_multi_brand_job(job, video_path, instagram_url, source_name, brand_inputs, user_id):
+    """Transcribe and analyze a video once, then rewrite it for every brand concurrently.
+
+    Each successful rewrite is saved as its own history entry; a failing brand
+    is reported in its result without affecting the others.
+    """
+    transcription = get_video_transcription(job, video_path, instagram_url)
+    job.emit('transcription', {'text': transcription})
+    
+    with job.stage('analyze'):
+        style_analysis = analyze_style(transcription)
+    
+    def rewrite_for(index, brand_input):
+        try:
+            rewritten_script = rewrite_script(transcription, style_analysis, brand_input)
+            script_id = save_script_result({
+                'source_type': 'instagram' if instagram_url else 'upload',
+                'source': instagram_url or source_name,
+                'brand_input': brand_input,
+                'transcription': transcription,
+                'style_analysis': style_analysis,
+                'rewritten_script': rewritten_script
+            }, user_id)
+            result = {'success': True, 'brand_input': brand_input, 'script_id': script_id,
+                      'rewritten_script': rewritten_script}
+        except Exception as e:
+            result = {'success': False, 'brand_input': brand_input, 'error': f"Error rewriting script: {str(e)}"}
+        job.emit('brand', dict(result, index=index))
+        return result
+    
+    # Rewrites share one bounded pool across all jobs
+    with job.stage('rewrite'):
+        futures = [rewrite_pool.submit(rewrite_for, index, brand_input)
+                   for index, brand_input in enumerate(brand_inputs)]
+        results = [future.result() for future in futures]
+    
+    return {
+        'success': any(result['success'] for result in results),
+        'mode': 'multi',
+        'transcription': transcription,
+        'style_analysis': style_analysis,
+        'results': results
+    }
+
+
 @app.route('/')
 def index():
     """Redirect to dashboard."""
@@ -890,8 +1163,8 @@ def dashboard():
     """Dashboard page."""
     user = get_current_user()
     stats = get_stats(user['id'])
-    scripts = get_all_scripts(user['id'])
-    return render_template('dashboard.html', stats=stats, recent_scripts=scripts[:5], user=user)
+    recent_scripts = get_scripts_page(user['id'], limit=5)['scripts']
+    return render_template('dashboard.html', stats=stats, recent_scripts=recent_scripts, user=user)
 
 
 @app.route('/generate')
@@ -905,8 +1178,14 @@ def generate():
 def history():
     """History page."""
     user = get_current_user()
-    scripts = get_all_scripts(user['id'])
-    return render_template('history.html', scripts=scripts, user=user)
+    cursor = request.args.get('cursor')
+    try:
+        page = get_scripts_page(user['id'], cursor=cursor)
+    except Exception:
+        cursor = None
+        page = get_scripts_page(user['id'])
+    return render_template('history.html', scripts=page['scripts'], next_cursor=page['next_cursor'],
+                           cursor=cursor, user=user)
 
 
 @app.route('/analytics')
@@ -919,10 +1198,10 @@ def analytics():
 
 @app.route('/library')
 def library():
-    """Library page."""
+    """Library page (first page only; library.js loads the rest from /api/scripts)."""
     user = get_current_user()
-    scripts = get_all_scripts(user['id'])
-    return render_template('library.html', scripts=scripts, user=user)
+    page = get_scripts_page(user['id'])
+    return render_template('library.html', scripts=page['scripts'], next_cursor=page['next_cursor'], user=user)
 
 
 @app.route('/settings')
@@ -1063,6 +1342,31 @@ def scrape_website():
         return jsonify({'error': str(e)}), 400
 
 
+@app.route('/api/scripts')
+def list_scripts():
+    """List the current user's scripts one page at a time.
+    
+    Query params: cursor, limit, source_type (instagram/upload), sort (newest/oldest/longest).
+    """
+    try:
+        user = get_current_user()
+        source_type = request.args.get('source_type')
+        page = get_scripts_page(
+            user['id'],
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', 20, type=int),
+            source_type=source_type if source_type in ('instagram', 'upload') else None,
+            sort=request.args.get('sort', 'newest')
+        )
+        return jsonify({
+            'success': True,
+            'scripts': page['scripts'],
+            'next_cursor': page['next_cursor']
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
 @app.route('/api/script/<script_id>', methods=['GET', 'DELETE'])
 def handle_script(script_id):
     """Get or delete a script."""
@@ -1079,6 +1383,72 @@ def handle_script(script_id):
         return jsonify({'error': 'Failed to delete'}), 400
 
 
+EXPORT_CHUNK_SIZE = 64 * 1024  # bytes buffered before each write/compress
+
+
+def iter_export_chunks(scripts, fmt='json'):
+    """Serialize scripts one at a time, as a {"scripts": [...]} document or as NDJSON."""
+    if fmt == 'ndjson':
+        for script in scripts:
+            yield json.dumps(script, ensure_ascii=False) + '\n'
+        return
+    
+    yield '{"scripts": ['
+    separator = '\n'
+    for script in scripts:
+        yield separator + json.dumps(script, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+def stream_export(chunks, compress=False):
+    """Encode export chunks in ~64 KB blocks, gzip-compressing them if requested."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31 -> gzip
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= EXPORT_CHUNK_SIZE:
+            block = b''.join(buffer)
+            buffer = []
+            buffered = 0
+            block = compressor.compress(block) if compressor else block
+            if block:
+                yield block
+    
+    block = b''.join(buffer)
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+def export_response(scripts, filename, fmt='json', compress=False):
+    """Stream scripts as a downloadable JSON/NDJSON (optionally .gz) attachment."""
+    extension = 'ndjson' if fmt == 'ndjson' else 'json'
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    if compress:
+        extension += '.gz'
+        mimetype = 'application/gzip'
+    
+    return Response(
+        stream_export(iter_export_chunks(scripts, fmt), compress),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{extension}'}
+    )
+
+
+def get_export_options():
+    """Read format (json/ndjson) and gzip flag from the query string."""
+    fmt = request.args.get('format', 'json').lower()
+    if fmt not in ('json', 'ndjson'):
+        raise Exception('Invalid format. Use json or ndjson')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    return fmt, compress
+
+
 @app.route('/api/script/<script_id>/export')
 def export_script(script_id):
     """Export a single script as JSON."""
@@ -1086,75 +1456,155 @@ def export_script(script_id):
     if not script:
         return jsonify({'error': 'Script not found'}), 404
     
-    output = io.BytesIO()
-    output.write(json.dumps(script, indent=2).encode('utf-8'))
-    output.seek(0)
+    try:
+        fmt, compress = get_export_options()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
     
-    return send_file(
-        output,
-        mimetype='application/json',
-        as_attachment=True,
-        download_name=f'script_{script_id}.json'
-    )
+    if fmt == 'json' and not compress:
+        return Response(
+            json.dumps(script, indent=2),
+            mimetype='application/json',
+            headers={'Content-Disposition': f'attachment; filename=script_{script_id}.json'}
+        )
+    return export_response([script], f'script_{script_id}', fmt, compress)
 
 
 @app.route('/api/export-all')
 def export_all():
-    """Export all scripts as JSON."""
-    scripts = get_all_scripts()
-    
-    output = io.BytesIO()
-    output.write(json.dumps({'scripts': scripts}, indent=2).encode('utf-8'))
-    output.seek(0)
-    
-    return send_file(
-        output,
-        mimetype='application/json',
-        as_attachment=True,
-        download_name=f'all_scripts_{int(os.time.time())}.json'
-    )
+    """Export the current user's scripts, streamed straight from the store.
+    
+    Query params: format (json/ndjson), gzip (1/0), since/until (ISO date or timestamp).
+    """
+    try:
+        fmt, compress = get_export_options()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    since = request.args.get('since') or None
+    until = request.args.get('until') or None
+    if until and len(until) == 10:
+        until += 'T23:59:59.999999'  # a bare date includes the whole day
+    
+    user = get_current_user()
+    scripts = iter_scripts(user['id'], since=since, until=until)
+    return export_response(scripts, f'all_scripts_{int(time.time())}', fmt, compress)
 
 
 @app.route('/api/clear-history', methods=['POST'])
 def clear_history():
-    """Clear all history."""
+    """Clear the current user's history (like export and import, never other users')."""
     try:
-        if os.path.exists('data/history.json'):
-            with open('data/history.json', 'w') as f:
-                json.dump({'scripts': [], 'stats': {'total_scripts': 0, 'total_videos': 0}}, f)
+        clear_scripts(get_current_user()['id'])
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
+def iter_import_records(stream, fmt='json'):
+    """Parse uploaded scripts one record at a time from a JSON export or NDJSON stream."""
+    if fmt == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None  # counted as skipped
+    else:
+        yield from iter_json_array(codecs.getreader('utf-8')(stream), 'scripts')
+
+
 @app.route('/api/import-data', methods=['POST'])
 def import_data():
-    """Import scripts from JSON."""
+    """Import scripts from a JSON export or NDJSON, upserting by script id.
+    
+    The body is parsed as it streams in. Use ?format=ndjson (or Content-Type
+    application/x-ndjson) for NDJSON and ?gzip=1 (or Content-Encoding: gzip)
+    for compressed uploads.
+    """
     try:
-        data = request.get_json()
-        # Merge with existing data
-        from data_store import DATA_FILE, ensure_data_dir
-        ensure_data_dir()
+        user = get_saving_user()
         
-        with open(DATA_FILE, 'r') as f:
-            existing = json.load(f)
+        fmt = request.args.get('format', '').lower()
+        if not fmt:
+            fmt = 'ndjson' if request.mimetype == 'application/x-ndjson' else 'json'
+        if fmt not in ('json', 'ndjson'):
+            return jsonify({'error': 'Invalid format. Use json or ndjson'}), 400
         
-        if 'scripts' in data:
-            existing['scripts'].extend(data['scripts'])
-            existing['stats']['total_scripts'] = len(existing['scripts'])
-            existing['stats']['total_videos'] = len(existing['scripts'])
+        stream = request.stream
+        if request.args.get('gzip', '').lower() in ('1', 'true', 'yes') or request.content_encoding == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream)
         
-        with open(DATA_FILE, 'w') as f:
-            json.dump(existing, f, indent=2)
+        counts = import_scripts(iter_import_records(stream, fmt), user_id=user['id'])
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, **counts})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
+def get_video_source():
+    """Read the Instagram URL or save the uploaded video from the current form.
+
+    Returns (instagram_url, video_path, source_name); raises ValueError with a
+    user-facing message when neither is valid.
+    """
+    # Check if Instagram URL is provided
+    instagram_url = request.form.get('instagram_url', '').strip()
+    
+    if instagram_url:
+        # Downloaded by the worker
+        if not is_instagram_url(instagram_url):
+            raise ValueError('Invalid Instagram URL. Please provide a valid Instagram post/reel URL')
+        return instagram_url, None, ''
+    
+    if 'video' in request.files:
+        # Handle file upload
+        video_file = request.files['video']
+        if video_file.filename == '':
+            raise ValueError('No video file selected')
+        
+        if not allowed_file(video_file.filename):
+            raise ValueError('Invalid file type. Please upload a video file (MP4, MOV, AVI, MKV, WEBM)')
+        
+        # Save uploaded video (unique prefix so concurrent uploads don't collide)
+        filename = f"{uuid.uuid4().hex[:8]}_{secure_filename(video_file.filename)}"
+        video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        video_file.save(video_path)
+        return '', video_path, video_file.filename
+    
+    raise ValueError('Please provide either a video file or Instagram URL')
+
+
+def submit_video_job(fn, video_path, *args):
+    """Queue a video job for the current user and build the 202 response."""
+    # Get current user (saves a session-only guest)
+    user = get_saving_user()
+    
+    try:
+        job = job_queue.submit(fn, video_path, *args, user['id'], user_id=user['id'])
+    except QueueFullError as e:
+        if video_path and os.path.exists(video_path):
+            os.remove(video_path)
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('job_status', job_id=job.id),
+        'events_url': url_for('job_events', job_id=job.id)
+    }), 202
+
+
 @app.route('/process', methods=['POST'])
 def process_video():
-    """Process uploaded video and generate rewritten script."""
+    """Validate a video upload or Instagram URL and queue it for processing.
+    
+    Returns 202 with a job id right away; poll /api/jobs/<job_id> for the
+    current stage and, once done, the result.
+    """
     try:
         # Get process mode (transcription or full)
         process_mode = request.form.get('process_mode', 'transcription').strip()
@@ -1164,109 +1614,91 @@ def process_video():
         if process_mode == 'full' and not brand_input:
             return jsonify({'error': 'Please provide website URL or brand introduction for full process'}), 400
         
-        # Check if Instagram URL is provided
-        instagram_url = request.form.get('instagram_url', '').strip()
-        video_path = None
+        try:
+            instagram_url, video_path, source_name = get_video_source()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if instagram_url:
-            # Download from Instagram
-            if not is_instagram_url(instagram_url):
-                return jsonify({'error': 'Invalid Instagram URL. Please provide a valid Instagram post/reel URL'}), 400
-            
+        return submit_video_job(run_video_job, video_path, instagram_url, source_name, process_mode, brand_input)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/process/brands', methods=['POST'])
+def process_video_brands():
+    """Queue one video or Instagram URL to be rewritten for several brands.
+    
+    Takes the same video/instagram_url fields as /process plus `brand_inputs`,
+    either repeated or as one JSON array. The video is transcribed and its
+    style analyzed once; the rewrites then run concurrently and each is saved
+    as its own history entry. Returns 202 with a job id like /process.
+    """
+    try:
+        brand_inputs = request.form.getlist('brand_inputs')
+        if len(brand_inputs) == 1 and brand_inputs[0].strip().startswith('['):
             try:
-                video_path = download_instagram_video(instagram_url)
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
-        
-        elif 'video' in request.files:
-            # Handle file upload
-            video_file = request.files['video']
-            if video_file.filename == '':
-                return jsonify({'error': 'No video file selected'}), 400
-            
-            if not allowed_file(video_file.filename):
-                return jsonify({'error': 'Invalid file type. Please upload a video file (MP4, MOV, AVI, MKV, WEBM)'}), 400
-            
-            # Save uploaded video
-            filename = secure_filename(video_file.filename)
-            video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            video_file.save(video_path)
+                brand_inputs = json.loads(brand_inputs[0])
+            except ValueError:
+                return jsonify({'error': 'brand_inputs is not a valid JSON array'}), 400
+            if not all(isinstance(brand_input, str) for brand_input in brand_inputs):
+                return jsonify({'error': 'brand_inputs must be a list of strings'}), 400
+        brand_inputs = [brand_input.strip() for brand_input in brand_inputs if brand_input.strip()]
+        
+        if not brand_inputs:
+            return jsonify({'error': 'Please provide at least one brand introduction in brand_inputs'}), 400
+        if len(brand_inputs) > MAX_BRANDS:
+            return jsonify({'error': f'Too many brands. At most {MAX_BRANDS} per request'}), 400
         
-        else:
-            return jsonify({'error': 'Please provide either a video file or Instagram URL'}), 400
-        
-        # Process video
         try:
-            # Step 1: Extract audio
-            audio_path = extract_audio(video_path)
-            
-            # Step 2: Transcribe audio
-            transcription = transcribe_audio(audio_path)
-            
-            # Clean up files
-            if os.path.exists(video_path):
-                os.remove(video_path)
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-            
-            # Get current user
-            user = get_current_user()
-            
-            # If transcription-only mode, return just the transcription
-            if process_mode == 'transcription':
-                # Save to history (transcription only)
-                script_data = {
-                    'source_type': 'instagram' if instagram_url else 'upload',
-                    'source': instagram_url if instagram_url else video_file.filename if 'video_file' in locals() else '',
-                    'brand_input': '',
-                    'transcription': transcription,
-                    'style_analysis': '',
-                    'rewritten_script': ''
-                }
-                script_id = save_script_result(script_data, user['id'])
-                
-                return jsonify({
-                    'success': True,
-                    'mode': 'transcription',
-                    'script_id': script_id,
-                    'transcription': transcription
-                })
-            
-            # Full process: Step 3: Analyze and rewrite script
-            result = analyze_and_rewrite_script(transcription, brand_input)
-            
-            # Save to history
-            script_data = {
-                'source_type': 'instagram' if instagram_url else 'upload',
-                'source': instagram_url if instagram_url else video_file.filename if 'video_file' in locals() else '',
-                'brand_input': brand_input,
-                'transcription': transcription,
-                'style_analysis': result['style_analysis'],
-                'rewritten_script': result['rewritten_script']
-            }
-            script_id = save_script_result(script_data, user['id'])
-            
-            return jsonify({
-                'success': True,
-                'mode': 'full',
-                'script_id': script_id,
-                'transcription': transcription,
-                'style_analysis': result['style_analysis'],
-                'rewritten_script': result['rewritten_script']
-            })
+            instagram_url, video_path, source_name = get_video_source()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        except Exception as e:
-            # Clean up files on error
-            if os.path.exists(video_path):
-                os.remove(video_path)
-            if 'audio_path' in locals() and os.path.exists(audio_path):
-                os.remove(audio_path)
-            raise e
+        return submit_video_job(run_multi_brand_job, video_path, instagram_url, source_name, brand_inputs)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Get the stage, timings and (when finished) result of a processing job."""
+    job = job_queue.get(job_id)
+    if not job or job.user_id != get_current_user()['id']:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a job's stage changes, LLM tokens and final result as Server-Sent Events.
+
+    Event types: stage, transcription, token, done, failed. Reconnecting
+    clients resume after the Last-Event-ID they sent.
+    """
+    job = job_queue.get(job_id)
+    if not job or job.user_id != get_current_user()['id']:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        after = 0
+    
+    def generate():
+        for item in job.iter_events(after):
+            if item is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            event_id, event, data = item
+            yield f'id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # ==================== CLEANUP & STORAGE ROUTES ====================
 
 def get_folder_size(folder_path):
@@ -1334,55 +1766,34 @@ def api_transcribe():
                 'error': 'Invalid Instagram URL. Must be a valid instagram.com URL.'
             }), 400
         
-        # Download video
+        # Repeated reels come from the transcription cache; concurrent requests
+        # for the same reel share one download and transcription
         try:
-            video_path = download_instagram_video(instagram_url)
+            transcription, cached = transcribe_instagram_reel(instagram_url)
         except Exception as e:
-            return jsonify({
-                'success': False,
-                'error': f'Failed to download video: {str(e)}'
-            }), 400
+            if 'downloading Instagram video' in str(e):
+                return jsonify({
+                    'success': False,
+                    'error': f'Failed to download video: {str(e)}'
+                }), 400
+            raise
         
-        if not video_path:
+        if not transcription:
             return jsonify({
                 'success': False,
-                'error': 'Failed to download video'
-            }), 400
+                'error': 'Failed to transcribe audio. Video may have no speech.'
+            }), 500
         
-        audio_path = None
-        try:
-            # Extract audio
-            audio_path = extract_audio(video_path)
-            if not audio_path:
-                return jsonify({
-                    'success': False,
-                    'error': 'Failed to extract audio from video'
-                }), 500
-            
-            # Transcribe audio
-            transcription = transcribe_audio(audio_path)
-            if not transcription:
-                return jsonify({
-                    'success': False,
-                    'error': 'Failed to transcribe audio. Video may have no speech.'
-                }), 500
-            
-            # Return successful response
-            return jsonify({
-                'success': True,
-                'transcription': transcription,
-                'video_info': {
-                    'title': 'Instagram Video',
-                    'url': instagram_url
-                }
-            })
-            
-        finally:
-            # Cleanup files
-            if video_path and os.path.exists(video_path):
-                os.remove(video_path)
-            if audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
+        # Return successful response
+        return jsonify({
+            'success': True,
+            'transcription': transcription,
+            'cached': cached,
+            'video_info': {
+                'title': 'Instagram Video',
+                'url': instagram_url
+            }
+        })
                 
     except Exception as e:
         return jsonify({
@@ -1405,12 +1816,120 @@ def api_transcribe_info():
                 'url': 'https://www.instagram.com/reel/ABC123/'
             }
         },
-        'example_curl': "curl -X POST -H 'Content-Type: application/json' -d '{\"url\": \"YOUR_INSTAGRAM_URL\"}' https://YOUR_DOMAIN/api/transcribe"
+        'example_curl': "curl -X POST -H 'Content-Type: application/json' -d '{\"url\": \"YOUR_INSTAGRAM_URL\"}' https://YOUR_DOMAIN/api/transcribe",
+        'batch': {
+            'method': 'POST',
+            'endpoint': '/api/transcribe/batch',
+            'content_type': 'application/json',
+            'body': {
+                'urls': ['https://www.instagram.com/reel/ABC123/', 'https://www.instagram.com/p/DEF456/']
+            },
+            'response': 'application/x-ndjson, one line per video as it finishes'
+        }
     })
 
 
+@app.route('/api/transcribe/batch', methods=['POST'])
+def api_transcribe_batch():
+    """
+    Transcribe a list of Instagram videos, streaming results as NDJSON.
+    
+    Expected JSON body:
+    {
+        "urls": ["https://www.instagram.com/reel/ABC123/", ...]
+    }
+    
+    URLs are de-duplicated by shortcode. One JSON line is written per reel as
+    soon as it finishes (in completion order), followed by a summary line:
+    {"url": "...", "shortcode": "ABC123", "duplicates": [], "success": true, "cached": false, "transcription": "..."}
+    {"done": true, "total": 1, "succeeded": 1, "failed": 0, "duplicates": 0}
+    """
+    data = request.get_json(silent=True)
+    urls = data.get('urls') if isinstance(data, dict) else None
+    if not isinstance(urls, list) or not urls:
+        return jsonify({
+            'success': False,
+            'error': 'Missing required field: urls (a list of Instagram URLs)'
+        }), 400
+    if len(urls) > BATCH_MAX_URLS:
+        return jsonify({
+            'success': False,
+            'error': f'Too many URLs. At most {BATCH_MAX_URLS} per batch'
+        }), 400
+    
+    # Group the URLs by shortcode so each reel is processed once
+    reels = {}
+    invalid = []
+    for url in urls:
+        url = url.strip() if isinstance(url, str) else ''
+        shortcode = get_instagram_shortcode(url) if url else None
+        if not shortcode:
+            invalid.append(url)
+        elif shortcode in reels:
+            reels[shortcode]['duplicates'].append(url)
+        else:
+            reels[shortcode] = {'url': url, 'shortcode': shortcode, 'duplicates': []}
+    
+    def process(reel):
+        try:
+            # Downloads and transcriptions each hold a batch slot, so a batch keeps
+            # downloading the next reels while earlier ones are being transcribed
+            transcription, cached = transcribe_instagram_reel(reel['url'], download_slots=batch_download_slots,
+                                                              transcribe_slots=batch_transcribe_slots)
+            return dict(reel, success=True, cached=cached, transcription=transcription)
+        except Exception as e:
+            return dict(reel, success=False, error=str(e))
+    
+    def generate():
+        counts = {'succeeded': 0, 'failed': len(invalid)}
+        for url in invalid:
+            yield json.dumps({'url': url, 'success': False, 'error': 'Invalid Instagram URL'}) + '\n'
+        
+        # Enough threads for downloads and transcriptions to overlap; the batch
+        # slots bound the actual work
+        executor = ThreadPoolExecutor(max_workers=min(BATCH_DOWNLOAD_WORKERS + BATCH_TRANSCRIBE_WORKERS,
+                                                      max(len(reels), 1)),
+                                      thread_name_prefix='batch')
+        try:
+            futures = [executor.submit(process, reel) for reel in reels.values()]
+            for future in as_completed(futures):
+                result = future.result()
+                counts['succeeded' if result['success'] else 'failed'] += 1
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+        finally:
+            # Stop queued reels if the client went away
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        yield json.dumps({
+            'done': True,
+            'total': len(reels) + len(invalid),
+            'succeeded': counts['succeeded'],
+            'failed': counts['failed'],
+            'duplicates': len(urls) - len(reels) - len(invalid)
+        }) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # ==================== STORAGE & CLEANUP ENDPOINTS ====================
 
+@app.route('/api/metrics')
+def metrics():
+    """Get internal counters for caches and storage."""
+    return jsonify({
+        'success': True,
+        'guests': get_guest_stats(),
+        'user_cache': user_cache.info(),
+        'jobs': job_queue.info(),
+        'transcript_cache': transcript_cache.info(),
+        'llm': get_llm_usage(),
+        'scrape_cache': scrape_cache.info(),
+        'http_pool': get_pool_stats(),
+        'reel_coalescing': reel_flights.info()
+    })
+
+
 @app.route('/api/storage-info')
 def storage_info():
     """Get storage usage information."""
@@ -1522,4 +2041,9 @@ if __name__ == '__main__':
     print(f"\n📍 Open your browser to: http://localhost:{port}")
     print("="*60 + "\n")
     
+    # Periodically remove idle guest accounts that never saved anything. With the
+    # debug reloader only the serving child (WERKZEUG_RUN_MAIN) runs it, not the watcher
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_guest_compactor()
+    
     app.run(debug=debug, host='0.0.0.0', port=port)
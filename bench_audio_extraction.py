@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Audio extraction benchmark
+Compares the old MoviePy MP3 export with the direct ffmpeg extraction in
+media.py (wall time and size of the audio sent to Whisper).
+
+Usage: python bench_audio_extraction.py video1.mp4 [video2.mp4 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from media import extract_audio
+
+
+def extract_with_moviepy(video_path):
+    """The previous implementation: decode with MoviePy and write an MP3 to disk."""
+    from moviepy.editor import VideoFileClip
+
+    fd, audio_path = tempfile.mkstemp(suffix='.mp3')
+    os.close(fd)
+    try:
+        video = VideoFileClip(video_path)
+        video.audio.write_audiofile(audio_path, logger=None)
+        video.close()
+        return os.path.getsize(audio_path)
+    finally:
+        os.remove(audio_path)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    size = fn(*args)
+    return time.perf_counter() - start, size
+
+
+def main():
+    videos = sys.argv[1:]
+    if not videos:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    try:
+        import moviepy.editor  # noqa: F401
+        has_moviepy = True
+    except ImportError:
+        has_moviepy = False
+        print("⚠ MoviePy not installed - only the ffmpeg paths will be measured\n")
+
+    methods = [
+        ('ffmpeg (stream copy)', lambda path: len(extract_audio(path, stream_copy=True)[1])),
+        ('ffmpeg (opus)', lambda path: len(extract_audio(path, stream_copy=False)[1])),
+    ]
+    if has_moviepy:
+        methods.insert(0, ('moviepy (mp3)', extract_with_moviepy))
+
+    print(f"{'video':<30} {'method':<22} {'seconds':>9} {'bytes':>12}")
+    print("-" * 76)
+    for video_path in videos:
+        name = os.path.basename(video_path)[:30]
+        for label, fn in methods:
+            try:
+                seconds, size = timed(fn, video_path)
+                print(f"{name:<30} {label:<22} {seconds:>9.2f} {size:>12,}")
+            except Exception as e:
+                print(f"{name:<30} {label:<22} failed: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+HTML extraction benchmark
+Compares the old BeautifulSoup multi-pass extraction with the single-pass
+extractor in html_extract.py (wall time and characters extracted) on saved
+pages or live URLs.
+
+Usage: python bench_html_extraction.py page1.html|https://... [page2.html ...] [--runs N]
+"""
+
+import sys
+import time
+
+from html_extract import LXML_AVAILABLE, extract_page
+
+
+def load(source):
+    if source.startswith(('http://', 'https://')):
+        from http_client import fetch_page, run_http
+        return run_http(fetch_page(source, {'User-Agent': 'Mozilla/5.0'}, timeout=15)).text
+    with open(source, encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def extract_with_soup(html):
+    """Condensed previous implementation: a tree, selector queries and repeated get_text walks."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'noscript']):
+        element.decompose()
+    title = soup.title.string if soup.title else None
+    meta = {m.get('name') or m.get('property'): m.get('content') for m in soup.find_all('meta')}
+    main = (soup.find('main') or soup.find('article')
+            or soup.find('div', class_=lambda c: c and any(x in c.lower() for x in ['content', 'main'])))
+    headings = [h.get_text(strip=True) for tag in ('h1', 'h2', 'h3') for h in soup.find_all(tag)[:5]]
+    for element in soup(['nav', 'footer', 'header', 'aside', 'iframe', 'form', 'button']):
+        element.decompose()
+    content = (main or soup.find('body') or soup).get_text(separator=' ', strip=True)
+    paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')[:50]]
+    blocks = [t for t in (d.get_text(strip=True) for d in soup.find_all(['div', 'section', 'article', 'p', 'span']))
+              if len(t) > 50]
+    return len(title or '') + len(str(meta)) + len(' '.join(headings)) + len(content[:2000]) \
+        + len(' '.join(paragraphs)) + len(' '.join(blocks[:10]))
+
+
+def extract_single_pass(html):
+    page = extract_page(html)
+    return len(page['title'] or '') + len(str(page['meta'])) + len(' '.join(page['headings'])) \
+        + len(page['content']) + len(page['about']) + len(' '.join(page['text_blocks'][:10]))
+
+
+def timed(fn, html, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        chars = fn(html)
+    return (time.perf_counter() - start) / runs, chars
+
+
+def main():
+    args = sys.argv[1:]
+    runs = 5
+    if '--runs' in args:
+        index = args.index('--runs')
+        runs = int(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    methods = [('single pass (' + ('lxml' if LXML_AVAILABLE else 'html.parser') + ')', extract_single_pass)]
+    try:
+        import bs4  # noqa: F401
+        methods.insert(0, ('beautifulsoup', extract_with_soup))
+    except ImportError:
+        print("⚠ beautifulsoup4 not installed - only the single-pass extractor will be measured\n")
+
+    print(f"{'page':<32} {'method':<26} {'KB':>7} {'ms':>9} {'chars':>8}")
+    print("-" * 86)
+    for source in args:
+        name = source[-32:]
+        try:
+            html = load(source)
+        except Exception as e:
+            print(f"{name:<32} failed to load: {e}")
+            continue
+        for label, fn in methods:
+            seconds, chars = timed(fn, html, runs)
+            print(f"{name:<32} {label:<26} {len(html) / 1024:>7.0f} {seconds * 1000:>9.1f} {chars:>8,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Style analysis + rewrite benchmark
+Compares the two-call path (analyze, then rewrite) with the one-shot
+structured JSON call: wall time, LLM calls and prompt/completion tokens.
+Needs GROQ_API_KEY in .env.
+
+Usage: python bench_rewrite.py transcription.txt "Brand introduction" [runs]
+"""
+
+import sys
+import time
+
+import app
+
+
+def run(transcription, brand_input, one_shot):
+    before = app.get_llm_usage()
+    start = time.perf_counter()
+    result = app.analyze_and_rewrite_script(transcription, brand_input, one_shot=one_shot)
+    seconds = time.perf_counter() - start
+    after = app.get_llm_usage()
+    delta = {key: after[key] - before[key] for key in after}
+    return seconds, delta, result
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding='utf-8') as f:
+        transcription = f.read()
+    brand_input = sys.argv[2]
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    print(f"{'mode':<10} {'run':>3} {'seconds':>8} {'calls':>5} {'prompt':>7} {'output':>7} {'script chars':>12}")
+    print("-" * 60)
+    for label, one_shot in (('two-call', False), ('one-shot', True)):
+        totals = [0.0, 0, 0]
+        for index in range(runs):
+            seconds, delta, result = run(transcription, brand_input, one_shot)
+            totals[0] += seconds
+            totals[1] += delta['prompt_tokens']
+            totals[2] += delta['completion_tokens']
+            note = ' (fell back)' if delta['one_shot_fallbacks'] else ''
+            print(f"{label:<10} {index + 1:>3} {seconds:>8.2f} {delta['calls']:>5} {delta['prompt_tokens']:>7} "
+                  f"{delta['completion_tokens']:>7} {len(result['rewritten_script']):>12}{note}")
+        print(f"{label:<10} avg {totals[0] / runs:>8.2f} {'':>5} {totals[1] // runs:>7} {totals[2] // runs:>7}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
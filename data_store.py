@@ -1,49 +1,390 @@
 """
 Simple data storage for history and analytics
-Uses JSON file storage (can be upgraded to database later)
+Uses an SQLite database (WAL mode) with indexed lookups. The legacy JSON files
+(data/history.json, data/users.json) are migrated into it on first run.
 """
+import base64
 import json
 import os
-from datetime import datetime
-from typing import List, Dict
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterator
 import hashlib
 import secrets
 
 DATA_FILE = 'data/history.json'
 USERS_FILE = 'data/users.json'
+DB_FILE = 'data/app.db'
+
+MIGRATION_BATCH_SIZE = 500
+IMPORT_BATCH_SIZE = 500  # scripts per import transaction (stays under SQLite's variable limit)
+
+SCRIPT_COLUMNS = ('id', 'user_id', 'timestamp', 'source_type', 'source', 'brand_input',
+                  'transcription', 'style_analysis', 'rewritten_script',
+                  'transcription_length', 'script_length')
+USER_COLUMNS = ('id', 'email', 'password_hash', 'is_guest', 'created_at', 'last_login')
+
+# Lightweight projection used by list views; full bodies are loaded per script
+SUMMARY_COLUMNS = ('id', 'user_id', 'timestamp', 'source_type', 'source', 'brand_input', 'preview',
+                   'transcription_length', 'script_length')
+PREVIEW_LENGTH = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT,
+    password_hash TEXT,
+    is_guest INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    last_login TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+CREATE TABLE IF NOT EXISTS scripts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    timestamp TEXT NOT NULL DEFAULT '',
+    source_type TEXT,
+    source TEXT,
+    brand_input TEXT,
+    transcription TEXT,
+    style_analysis TEXT,
+    rewritten_script TEXT,
+    transcription_length INTEGER NOT NULL DEFAULT 0,
+    script_length INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_scripts_user_timestamp ON scripts(user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_scripts_timestamp ON scripts(timestamp);
+
+CREATE TABLE IF NOT EXISTS script_summaries (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    timestamp TEXT NOT NULL DEFAULT '',
+    source_type TEXT,
+    source TEXT,
+    brand_input TEXT,
+    preview TEXT,
+    transcription_length INTEGER NOT NULL DEFAULT 0,
+    script_length INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_user_timestamp ON script_summaries(user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_summaries_user_length ON script_summaries(user_id, script_length);
+
+-- Running aggregates maintained on every save/delete/import (see apply_stats)
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    transcription_sum INTEGER NOT NULL DEFAULT 0,
+    script_sum INTEGER NOT NULL DEFAULT 0,
+    instagram_count INTEGER NOT NULL DEFAULT 0,
+    upload_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- Whisper results keyed by reel shortcode or media hash (see TranscriptCache)
+CREATE TABLE IF NOT EXISTS transcript_cache (
+    key TEXT PRIMARY KEY,
+    transcription TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcript_cache_last_used ON transcript_cache(last_used);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
 
 def ensure_data_dir():
-    """Create data directory if it doesn't exist."""
-    os.makedirs('data', exist_ok=True)
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'w') as f:
-            json.dump({'scripts': [], 'stats': {'total_scripts': 0, 'total_videos': 0}}, f)
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'w') as f:
-            json.dump({'users': []}, f)
+    """Create data directory and database schema, migrating legacy JSON data once."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        os.makedirs('data', exist_ok=True)
+        conn = _connect()
+        conn.executescript(SCHEMA)
+        migrate_json_files(conn)
+        _backfill_summaries(conn)
+        conn.close()
+        _initialized = True
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a new connection to the database in WAL mode."""
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL lets page views read while a save is being committed
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def get_db() -> sqlite3.Connection:
+    """Get the database connection for the current thread."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        ensure_data_dir()
+        conn = _connect()
+        _local.conn = conn
+    return conn
+
+
+# ==================== JSON MIGRATION ====================
+
+def iter_json_array(fp, key: str, chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+    """Yield items of the array stored under `key` without loading the whole document."""
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    buf = ''
+
+    # Seek to the opening bracket of the array
+    while True:
+        idx = buf.find(marker)
+        if idx != -1:
+            bracket = buf.find('[', idx + len(marker))
+            if bracket != -1:
+                buf = buf[bracket + 1:]
+                break
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            return
+        buf += chunk
+
+    # Decode one item at a time, reading more input only when an item is incomplete
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(','):
+            buf = buf[1:].lstrip()
+        if buf.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                raise
+            buf += chunk
+            continue
+        yield item
+        buf = buf[end:]
+
+
+def _script_row(script: Dict) -> tuple:
+    """Convert a script dict into a row tuple for the scripts table."""
+    return (
+        script.get('id'),
+        script.get('user_id'),
+        script.get('timestamp', ''),
+        script.get('source_type', 'upload'),
+        script.get('source', ''),
+        script.get('brand_input', ''),
+        script.get('transcription', ''),
+        script.get('style_analysis', ''),
+        script.get('rewritten_script', ''),
+        script.get('transcription_length', len(script.get('transcription') or '')),
+        script.get('script_length', len(script.get('rewritten_script') or '')),
+    )
+
+
+def _user_row(user: Dict) -> tuple:
+    """Convert a user dict into a row tuple for the users table."""
+    return (
+        user.get('id'),
+        user.get('email'),
+        user.get('password_hash'),
+        1 if user.get('is_guest') else 0,
+        user.get('created_at'),
+        user.get('last_login'),
+    )
+
+
+def _migrate_file(conn: sqlite3.Connection, path: str, key: str, table: str, columns: tuple, to_row) -> int:
+    """Stream one legacy JSON file into `table` in batches and mark it as migrated."""
+    if not os.path.exists(path):
+        return 0
+
+    sql = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    migrated = 0
+    batch = []
+    with open(path, 'r', encoding='utf-8') as f:
+        with conn:
+            for item in iter_json_array(f, key):
+                if not item.get('id'):
+                    continue
+                batch.append(to_row(item))
+                if len(batch) >= MIGRATION_BATCH_SIZE:
+                    conn.executemany(sql, batch)
+                    migrated += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(sql, batch)
+                migrated += len(batch)
+
+    os.replace(path, path + '.migrated')
+    return migrated
+
+
+def _backfill_summaries(conn: sqlite3.Connection):
+    """Create summary rows for scripts stored before script_summaries existed."""
+    scripts = conn.execute('SELECT COUNT(*) FROM scripts').fetchone()[0]
+    summaries = conn.execute('SELECT COUNT(*) FROM script_summaries').fetchone()[0]
+    if scripts == summaries:
+        return
+    with conn:
+        conn.execute(
+            f"""INSERT OR IGNORE INTO script_summaries ({', '.join(SUMMARY_COLUMNS)})
+                SELECT id, user_id, timestamp, source_type, source,
+                       substr(brand_input, 1, {PREVIEW_LENGTH}),
+                       substr(COALESCE(NULLIF(rewritten_script, ''), transcription, ''), 1, {PREVIEW_LENGTH}),
+                       transcription_length, script_length
+                FROM scripts"""
+        )
+
+
+def migrate_json_files(conn: sqlite3.Connection) -> Dict:
+    """One-time migration of data/history.json and data/users.json into SQLite."""
+    return {
+        'users': _migrate_file(conn, USERS_FILE, 'users', 'users', USER_COLUMNS, _user_row),
+        'scripts': _migrate_file(conn, DATA_FILE, 'scripts', 'scripts', SCRIPT_COLUMNS, _script_row),
+    }
+
 
 # ==================== USER MANAGEMENT ====================
 
+# User cache bounds: rows older than the TTL (seconds) are re-read, so changes
+# made by another process show up within it; least recently used rows go first
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+
+
+class UserCache:
+    """Process-local write-through cache of user rows, indexed by id and by email.
+
+    Every user write in this process goes through this module, so entries are
+    updated in place instead of being re-read; rows are loaded lazily on the
+    first lookup. Writes from other processes are picked up once an entry
+    outlives `ttl`.
+    """
+
+    def __init__(self, ttl: int = USER_CACHE_TTL, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._by_id = OrderedDict()  # id -> (user, cached_at), least recently used first
+        self._by_email = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, user_id: str) -> Dict:
+        """Fresh entry for `user_id` or None, counting the hit/miss (caller holds the lock)."""
+        entry = self._by_id.get(user_id)
+        if entry is not None and time.time() - entry[1] >= self.ttl:
+            self._drop(user_id)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(user_id)
+        self.hits += 1
+        return dict(entry[0])
+
+    def _drop(self, user_id: str):
+        entry = self._by_id.pop(user_id, None)
+        if entry and self._by_email.get(entry[0].get('email')) == user_id:
+            del self._by_email[entry[0]['email']]
+
+    def get(self, user_id: str) -> Dict:
+        with self._lock:
+            return self._lookup(user_id)
+
+    def get_by_email(self, email: str) -> Dict:
+        with self._lock:
+            user_id = self._by_email.get(email)
+            if user_id is None:
+                self.misses += 1
+                return None
+            return self._lookup(user_id)
+
+    def put(self, user: Dict):
+        with self._lock:
+            self._drop(user['id'])
+            self._by_id[user['id']] = (dict(user), time.time())
+            if user.get('email') and not user.get('is_guest'):
+                self._by_email[user['email']] = user['id']
+            while len(self._by_id) > self.max_entries:
+                self._drop(next(iter(self._by_id)))
+                self.evictions += 1
+
+    def discard(self, user_id: str):
+        with self._lock:
+            self._drop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._by_email.clear()
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {'size': len(self._by_id), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'max_entries': self.max_entries, 'ttl': self.ttl}
+
+
+user_cache = UserCache()
+
+
 def hash_password(password: str) -> str:
     """Hash a password using SHA-256."""
     return hashlib.sha256(password.encode()).hexdigest()
 
+
+def _user_from_row(row: sqlite3.Row) -> Dict:
+    """Convert a users row into the user dict used by the app."""
+    if row is None:
+        return None
+    user = dict(row)
+    user['is_guest'] = bool(user['is_guest'])
+    return user
+
+
+def _get_user_by_email(email: str) -> Dict:
+    """Get a registered (non-guest) user by email."""
+    user = user_cache.get_by_email(email)
+    if user:
+        return user
+    row = get_db().execute(
+        'SELECT * FROM users WHERE email = ? AND is_guest = 0', (email,)
+    ).fetchone()
+    user = _user_from_row(row)
+    if user:
+        user_cache.put(user)
+    return user
+
+
 def create_user(email: str, password: str, is_guest: bool = False) -> Dict:
     """Create a new user account."""
-    ensure_data_dir()
-    
-    with open(USERS_FILE, 'r') as f:
-        db = json.load(f)
-    
+    conn = get_db()
+
     # Check if user already exists
-    if not is_guest:
-        for user in db['users']:
-            if user.get('email') == email and not user.get('is_guest'):
-                raise Exception('User with this email already exists')
-    
+    if not is_guest and _get_user_by_email(email):
+        raise Exception('User with this email already exists')
+
     # Generate user ID
     user_id = 'guest_' + secrets.token_urlsafe(16) if is_guest else 'user_' + secrets.token_urlsafe(16)
-    
+
     # Create user entry
     user = {
         'id': user_id,
@@ -53,61 +394,429 @@ def create_user(email: str, password: str, is_guest: bool = False) -> Dict:
         'created_at': datetime.now().isoformat(),
         'last_login': datetime.now().isoformat()
     }
-    
-    db['users'].append(user)
-    
-    with open(USERS_FILE, 'w') as f:
-        json.dump(db, f, indent=2)
-    
+
+    with conn:
+        conn.execute(
+            f"INSERT INTO users ({', '.join(USER_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            _user_row(user)
+        )
+    user_cache.put(user)
+
     return user
 
+
 def authenticate_user(email: str, password: str) -> Dict:
     """Authenticate a user with email and password."""
-    ensure_data_dir()
-    
-    with open(USERS_FILE, 'r') as f:
-        db = json.load(f)
-    
-    password_hash = hash_password(password)
-    
-    for user in db['users']:
-        if user.get('email') == email and user.get('password_hash') == password_hash:
-            # Update last login
-            user['last_login'] = datetime.now().isoformat()
-            with open(USERS_FILE, 'w') as f:
-                json.dump(db, f, indent=2)
-            return user
-    
-    return None
+    user = _get_user_by_email(email)
+    if not user or user.get('password_hash') != hash_password(password):
+        return None
+
+    # Update last login
+    user['last_login'] = datetime.now().isoformat()
+    conn = get_db()
+    with conn:
+        conn.execute('UPDATE users SET last_login = ? WHERE id = ?', (user['last_login'], user['id']))
+    user_cache.put(user)
+    return user
+
 
 def get_user_by_id(user_id: str) -> Dict:
     """Get user by ID."""
-    ensure_data_dir()
-    
-    with open(USERS_FILE, 'r') as f:
-        db = json.load(f)
-    
-    for user in db['users']:
-        if user.get('id') == user_id:
-            return user
-    
-    return None
+    user = user_cache.get(user_id)
+    if user:
+        return user
+    row = get_db().execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    user = _user_from_row(row)
+    if user:
+        user_cache.put(user)
+    return user
+
+
+# ==================== GUEST ACCOUNTS ====================
+
+GUEST_IDLE_DAYS = int(os.getenv('GUEST_IDLE_DAYS', 30))
+GUEST_COMPACT_INTERVAL = int(os.getenv('GUEST_COMPACT_INTERVAL', 3600))
+# A stored guest's last_login is refreshed at most this often (seconds) while it is active
+GUEST_TOUCH_INTERVAL = int(os.getenv('GUEST_TOUCH_INTERVAL', 3600))
+
+_guest_lock = threading.Lock()
+_guest_counters = {'deferred': 0, 'materialized': 0, 'purged': 0}
+
+
+def _count_guest(counter: str, amount: int = 1):
+    with _guest_lock:
+        _guest_counters[counter] += amount
+
+
+def new_guest_user(user_id: str = None, created_at: str = None) -> Dict:
+    """Build a guest identity that is only kept in the session until it saves something."""
+    if user_id is None:
+        user_id = 'guest_' + secrets.token_urlsafe(16)
+        _count_guest('deferred')
+    created_at = created_at or datetime.now().isoformat()
+    return {
+        'id': user_id,
+        'email': None,
+        'password_hash': None,
+        'is_guest': True,
+        'created_at': created_at,
+        'last_login': created_at
+    }
+
+
+def save_guest_user(user: Dict) -> Dict:
+    """Persist a session-only guest identity (no-op if it is already stored)."""
+    conn = get_db()
+    with conn:
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO users ({', '.join(USER_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            _user_row(user)
+        )
+    if cursor.rowcount:
+        _count_guest('materialized')
+    user_cache.put(user)
+    return user
+
+
+def touch_guest(user: Dict) -> Dict:
+    """Record activity of a stored guest so it does not count as idle.
+
+    Writes at most once per GUEST_TOUCH_INTERVAL per guest.
+    """
+    now = datetime.now()
+    last_seen = user.get('last_login') or user.get('created_at') or ''
+    if last_seen >= (now - timedelta(seconds=GUEST_TOUCH_INTERVAL)).isoformat():
+        return user
+    user = dict(user, last_login=now.isoformat())
+    conn = get_db()
+    with conn:
+        conn.execute('UPDATE users SET last_login = ? WHERE id = ? AND is_guest = 1', (user['last_login'], user['id']))
+    user_cache.put(user)
+    return user
+
+
+def purge_idle_guests(max_idle_days: int = GUEST_IDLE_DAYS) -> int:
+    """Delete guest accounts idle for `max_idle_days` that have no saved scripts."""
+    cutoff = (datetime.now() - timedelta(days=max_idle_days)).isoformat()
+    history = get_history()
+    conn = get_db()
+    with conn:
+        rows = conn.execute(
+            "SELECT id FROM users WHERE is_guest = 1 AND COALESCE(last_login, created_at, '') < ?",
+            (cutoff,)
+        ).fetchall()
+        guest_ids = [row['id'] for row in rows if not history.has_scripts(row['id'])]
+        # Re-check idleness in the DELETE: the guest may have been touched since the SELECT
+        conn.executemany(
+            "DELETE FROM users WHERE id = ? AND is_guest = 1 AND COALESCE(last_login, created_at, '') < ?",
+            [(guest_id, cutoff) for guest_id in guest_ids]
+        )
+
+    for guest_id in guest_ids:
+        user_cache.discard(guest_id)
+    _count_guest('purged', len(guest_ids))
+    return len(guest_ids)
+
+
+def start_guest_compactor(interval: int = GUEST_COMPACT_INTERVAL, max_idle_days: int = GUEST_IDLE_DAYS) -> threading.Thread:
+    """Run purge_idle_guests() every `interval` seconds in a daemon thread."""
+
+    def run():
+        while True:
+            try:
+                purge_idle_guests(max_idle_days)
+            except Exception as e:
+                print(f"Guest compaction failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='guest-compactor', daemon=True)
+    thread.start()
+    return thread
+
+
+def get_guest_stats() -> Dict:
+    """Counters for session-only guests and purged guest accounts."""
+    with _guest_lock:
+        counters = dict(_guest_counters)
+    return {
+        'guests_deferred': counters['deferred'],
+        'guests_materialized': counters['materialized'],
+        'guests_avoided': max(counters['deferred'] - counters['materialized'], 0),
+        'guests_purged': counters['purged']
+    }
+
+
+# ==================== TRANSCRIPTION CACHE ====================
+
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', 30 * 86400))  # seconds
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_MAX_ENTRIES', 5000))
+
+
+def instagram_cache_key(shortcode: str) -> str:
+    """Cache key for an Instagram post/reel (every URL variant maps to one shortcode)."""
+    return f'ig:{shortcode}' if shortcode else None
+
+
+def file_cache_key(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Cache key for an uploaded file: the SHA-256 of its contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return f'sha256:{digest.hexdigest()}'
+
+
+class TranscriptCache:
+    """Persistent transcription cache with TTL expiry and least-recently-used eviction."""
+
+    def __init__(self, ttl: int = TRANSCRIPT_CACHE_TTL, max_entries: int = TRANSCRIPT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key: str, count: bool = True) -> str:
+        """Return the cached transcription for `key`, or None on a miss.
+
+        Pass count=False for a repeat lookup that should not move the hit/miss counters.
+        """
+        if not key:
+            return None
+        now = time.time()
+        conn = get_db()
+        row = conn.execute(
+            'SELECT transcription FROM transcript_cache WHERE key = ? AND created_at >= ?',
+            (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            if count:
+                self._count('misses')
+            return None
+        with conn:
+            conn.execute('UPDATE transcript_cache SET last_used = ? WHERE key = ?', (now, key))
+        if count:
+            self._count('hits')
+        return row['transcription']
+
+    def put(self, key: str, transcription: str):
+        if not key or transcription is None:
+            return
+        now = time.time()
+        conn = get_db()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO transcript_cache (key, transcription, created_at, last_used) '
+                'VALUES (?, ?, ?, ?)',
+                (key, transcription, now, now)
+            )
+            expired = conn.execute('DELETE FROM transcript_cache WHERE created_at < ?', (now - self.ttl,)).rowcount
+            overflow = conn.execute(
+                'DELETE FROM transcript_cache WHERE key IN ('
+                'SELECT key FROM transcript_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+        if expired or overflow:
+            self._count('evictions', expired + overflow)
+
+    def clear(self) -> int:
+        conn = get_db()
+        with conn:
+            return conn.execute('DELETE FROM transcript_cache').rowcount
+
+    def info(self) -> Dict:
+        size = get_db().execute('SELECT COUNT(*) FROM transcript_cache').fetchone()[0]
+        with self._lock:
+            return {
+                'size': size,
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+transcript_cache = TranscriptCache()
+
 
 # ==================== SCRIPT MANAGEMENT ====================
 
+# 'sqlite' (default) or 'log' (append-only journal, see history_log.py)
+HISTORY_BACKEND = os.getenv('HISTORY_BACKEND', 'sqlite').lower()
+
+_history = None
+_history_lock = threading.Lock()
+
+# Sort options for paginated listings: column used for the keyset and its direction
+PAGE_SORTS = {
+    'newest': ('timestamp', 'DESC'),
+    'oldest': ('timestamp', 'ASC'),
+    'longest': ('script_length', 'DESC'),
+}
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def make_summary(script: Dict) -> Dict:
+    """Summary projection of a script: metadata, lengths and truncated previews."""
+    return {
+        'id': script.get('id'),
+        'user_id': script.get('user_id'),
+        'timestamp': script.get('timestamp', ''),
+        'source_type': script.get('source_type', 'upload'),
+        'source': script.get('source', ''),
+        'brand_input': (script.get('brand_input') or '')[:PREVIEW_LENGTH],
+        'preview': (script.get('rewritten_script') or script.get('transcription') or '')[:PREVIEW_LENGTH],
+        'transcription_length': script.get('transcription_length') or 0,
+        'script_length': script.get('script_length') or 0,
+    }
+
+
+class SQLiteHistory:
+    """Script history stored in the `scripts` table, with list views served
+    from the narrow `script_summaries` table.
+
+    Methods run on the calling thread's connection without committing; the
+    module-level functions wrap them in a transaction.
+    """
+
+    def _insert_summary(self, script: Dict):
+        summary = make_summary(script)
+        get_db().execute(
+            f"INSERT OR REPLACE INTO script_summaries ({', '.join(SUMMARY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SUMMARY_COLUMNS))})",
+            tuple(summary[c] for c in SUMMARY_COLUMNS)
+        )
+
+    def insert(self, entry: Dict):
+        get_db().execute(
+            f"INSERT INTO scripts ({', '.join(SCRIPT_COLUMNS)}) VALUES ({', '.join('?' * len(SCRIPT_COLUMNS))})",
+            _script_row(entry)
+        )
+        self._insert_summary(entry)
+
+    def get(self, script_id: str) -> Dict:
+        row = get_db().execute('SELECT * FROM scripts WHERE id = ?', (script_id,)).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, script_id: str) -> Dict:
+        entry = self.get(script_id)
+        if entry:
+            get_db().execute('DELETE FROM scripts WHERE id = ?', (script_id,))
+            get_db().execute('DELETE FROM script_summaries WHERE id = ?', (script_id,))
+        return entry
+
+    def iter_scripts(self, user_id: str = None, since: str = None, until: str = None,
+                     batch_size: int = 200) -> Iterator[Dict]:
+        where, params = [], []
+        if user_id:
+            where.append('user_id = ?')
+            params.append(user_id)
+        if since:
+            where.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            where.append('timestamp <= ?')
+            params.append(until)
+        sql = 'SELECT * FROM scripts'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        cursor = get_db().execute(sql + ' ORDER BY timestamp DESC, id DESC', params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+
+    def page(self, user_id: str, sort: str, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE,
+             source_type: str = None) -> List[Dict]:
+        column, direction = PAGE_SORTS[sort]
+        where, params = [], []
+        if user_id:
+            where.append('user_id = ?')
+            params.append(user_id)
+        if source_type:
+            where.append('source_type = ?')
+            params.append(source_type)
+        if after:
+            where.append(f"({column}, id) {'<' if direction == 'DESC' else '>'} (?, ?)")
+            params.extend(after)
+        sql = 'SELECT * FROM script_summaries'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {column} {direction}, id {direction} LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in get_db().execute(sql, params)]
+
+    def has_scripts(self, user_id: str) -> bool:
+        return get_db().execute('SELECT 1 FROM scripts WHERE user_id = ? LIMIT 1', (user_id,)).fetchone() is not None
+
+    def clear(self, user_id: str = None) -> int:
+        if user_id:
+            get_db().execute('DELETE FROM script_summaries WHERE user_id = ?', (user_id,))
+            return get_db().execute('DELETE FROM scripts WHERE user_id = ?', (user_id,)).rowcount
+        get_db().execute('DELETE FROM script_summaries')
+        return get_db().execute('DELETE FROM scripts').rowcount
+
+    def get_many(self, script_ids: List[str]) -> Dict:
+        rows = get_db().execute(
+            f"SELECT * FROM scripts WHERE id IN ({', '.join('?' * len(script_ids))})", script_ids
+        )
+        return {row['id']: dict(row) for row in rows}
+
+    def put(self, entry: Dict):
+        """Insert or replace a script."""
+        get_db().execute(
+            f"INSERT OR REPLACE INTO scripts ({', '.join(SCRIPT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SCRIPT_COLUMNS))})",
+            _script_row(entry)
+        )
+        self._insert_summary(entry)
+
+    def iter_meta(self):
+        yield from get_db().execute(
+            'SELECT user_id, timestamp, source_type, transcription_length, script_length FROM script_summaries'
+        )
+
+
+def get_history():
+    """Get the configured script history backend."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                ensure_data_dir()
+                if HISTORY_BACKEND == 'log':
+                    from history_log import LogHistory
+                    _history = LogHistory()
+                else:
+                    _history = SQLiteHistory()
+                if not get_db().execute('SELECT 1 FROM user_stats WHERE user_id = ?', (ALL_USERS,)).fetchone():
+                    rebuild_stats(_history)
+    return _history
+
+
+def new_script_id(now: datetime = None) -> str:
+    """Time-sortable script id; the random suffix keeps ids unique when saves run concurrently."""
+    return (now or datetime.now()).strftime('%Y%m%d%H%M%S%f') + secrets.token_hex(4)
+
+
 def save_script_result(data: Dict, user_id: str = None) -> str:
     """Save a script generation result to history."""
-    ensure_data_dir()
-    
-    with open(DATA_FILE, 'r') as f:
-        db = json.load(f)
-    
     # Create new entry
-    script_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    now = datetime.now()
+    script_id = new_script_id(now)
     entry = {
         'id': script_id,
         'user_id': user_id,  # Link to user
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now.isoformat(),
         'source_type': data.get('source_type', 'upload'),
         'source': data.get('source', ''),
         'brand_input': data.get('brand_input', ''),
@@ -117,88 +826,277 @@ def save_script_result(data: Dict, user_id: str = None) -> str:
         'transcription_length': len(data.get('transcription', '')),
         'script_length': len(data.get('rewritten_script', ''))
     }
-    
-    db['scripts'].insert(0, entry)  # Add to beginning
-    db['stats']['total_scripts'] = len(db['scripts'])
-    db['stats']['total_videos'] = len(db['scripts'])
-    
-    with open(DATA_FILE, 'w') as f:
-        json.dump(db, f, indent=2)
-    
+
+    history = get_history()
+    with get_db():
+        history.insert(entry)
+        apply_stats(entry, 1)
+
     return script_id
 
-def get_all_scripts(user_id: str = None) -> List[Dict]:
-    """Get all saved scripts, optionally filtered by user."""
-    ensure_data_dir()
-    
-    with open(DATA_FILE, 'r') as f:
-        db = json.load(f)
-    
-    scripts = db.get('scripts', [])
-    
-    # Filter by user if specified
-    if user_id:
-        scripts = [s for s in scripts if s.get('user_id') == user_id]
-    
-    return scripts
+
+def encode_cursor(key, script_id: str) -> str:
+    """Opaque cursor pointing just past the script with this sort key and id."""
+    return base64.urlsafe_b64encode(json.dumps([key, script_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Turn a cursor from encode_cursor() back into a (key, id) tuple."""
+    try:
+        key, script_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return key, script_id
+    except (ValueError, TypeError):
+        raise Exception('Invalid cursor')
+
+
+def get_scripts_page(user_id: str, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE,
+                     source_type: str = None, sort: str = 'newest') -> Dict:
+    """Get one page of a user's script summaries using keyset pagination.
+
+    Returns summaries (see make_summary) plus `next_cursor`, which is None on
+    the last page. Use get_script_by_id() for the full script.
+    """
+    if sort not in PAGE_SORTS:
+        raise Exception(f"Invalid sort option: {sort}")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+
+    # Fetch one extra row to find out whether another page exists
+    scripts = get_history().page(user_id, sort, after, limit + 1, source_type)
+    next_cursor = None
+    if len(scripts) > limit:
+        scripts = scripts[:limit]
+        column = PAGE_SORTS[sort][0]
+        next_cursor = encode_cursor(scripts[-1][column], scripts[-1]['id'])
+
+    return {'scripts': scripts, 'next_cursor': next_cursor}
+
+
+def iter_scripts(user_id: str = None, since: str = None, until: str = None) -> Iterator[Dict]:
+    """Yield full scripts newest first without loading the whole history.
+
+    `since` and `until` are inclusive bounds on the ISO timestamp.
+    """
+    return get_history().iter_scripts(user_id, since, until)
+
 
 def get_script_by_id(script_id: str) -> Dict:
     """Get a specific script by ID."""
-    scripts = get_all_scripts()
-    for script in scripts:
-        if script['id'] == script_id:
-            return script
-    return None
+    return get_history().get(script_id)
+
 
 def delete_script(script_id: str) -> bool:
     """Delete a script from history."""
-    ensure_data_dir()
-    
-    with open(DATA_FILE, 'r') as f:
-        db = json.load(f)
-    
-    db['scripts'] = [s for s in db['scripts'] if s['id'] != script_id]
-    db['stats']['total_scripts'] = len(db['scripts'])
-    db['stats']['total_videos'] = len(db['scripts'])
-    
-    with open(DATA_FILE, 'w') as f:
-        json.dump(db, f, indent=2)
-    
+    history = get_history()
+    with get_db():
+        entry = history.delete(script_id)
+        if entry:
+            apply_stats(entry, -1)
     return True
 
+
+def clear_scripts(user_id: str = None) -> int:
+    """Delete all scripts, optionally only those of one user. Returns the number deleted."""
+    history = get_history()
+    with get_db():
+        clear_stats(user_id)
+        return history.clear(user_id)
+
+
+def _import_batch(history, scripts: List[Dict], user_id: str, counts: Dict):
+    """Upsert one batch of scripts by id inside a single transaction."""
+    # Fill in defaults so the stored rows, comparisons and aggregates agree
+    if user_id:
+        scripts = [dict(s, user_id=user_id) for s in scripts]
+    scripts = [dict(zip(SCRIPT_COLUMNS, _script_row(s))) for s in scripts]
+
+    with get_db():
+        existing = history.get_many(list({s['id'] for s in scripts}))
+        for script in scripts:
+            old = existing.get(script['id'])
+            if old is None:
+                history.put(script)
+                apply_stats(script, 1)
+                counts['inserted'] += 1
+            elif old == script or (user_id and old['user_id'] != user_id):
+                # Unchanged, or the id belongs to someone else's script
+                counts['skipped'] += 1
+                continue
+            else:
+                history.put(script)
+                apply_stats(old, -1)
+                apply_stats(script, 1)
+                counts['updated'] += 1
+            existing[script['id']] = script
+
+
+def import_scripts(scripts, user_id: str = None, batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    """Upsert previously exported scripts, keyed on script id.
+
+    `scripts` can be any iterable (e.g. a streaming parser); it is consumed in
+    batches of `batch_size`, one transaction each. If `user_id` is given the
+    scripts are imported for that user and other users' scripts are never
+    overwritten. Returns inserted/updated/skipped counts.
+    """
+    history = get_history()
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    batch = []
+    for script in scripts:
+        if not isinstance(script, dict) or not script.get('id'):
+            counts['skipped'] += 1
+            continue
+        batch.append(script)
+        if len(batch) >= batch_size:
+            _import_batch(history, batch, user_id, counts)
+            batch = []
+    if batch:
+        _import_batch(history, batch, user_id, counts)
+    return counts
+
+
+# ==================== STATS AGGREGATES ====================
+
+# user_stats key holding the totals across all users
+ALL_USERS = '*'
+RECENT_ACTIVITY_LIMIT = 10
+
+STATS_COLUMNS = ('total', 'transcription_sum', 'script_sum', 'instagram_count', 'upload_count')
+
+
+def _stats_delta(script: Dict, sign: int) -> tuple:
+    """Change to each user_stats column caused by adding (1) or removing (-1) a script."""
+    return (
+        sign,
+        sign * (script.get('transcription_length') or 0),
+        sign * (script.get('script_length') or 0),
+        sign * (script.get('source_type') == 'instagram'),
+        sign * (script.get('source_type') == 'upload'),
+    )
+
+
+def apply_stats(script: Dict, sign: int, conn: sqlite3.Connection = None):
+    """Add (sign=1) or remove (sign=-1) a script from the running aggregates."""
+    conn = conn or get_db()
+    delta = _stats_delta(script, sign)
+    day = (script.get('timestamp') or '')[:10]
+    for key in (script.get('user_id') or '', ALL_USERS):
+        conn.execute(
+            f"""INSERT INTO user_stats (user_id, {', '.join(STATS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                {', '.join(f'{c} = {c} + excluded.{c}' for c in STATS_COLUMNS)}""",
+            (key,) + delta
+        )
+        conn.execute(
+            """INSERT INTO user_daily_stats (user_id, day, count) VALUES (?, ?, ?)
+               ON CONFLICT(user_id, day) DO UPDATE SET count = count + excluded.count""",
+            (key, day, sign)
+        )
+
+
+def clear_stats(user_id: str = None):
+    """Reset the aggregates of one user (subtracting them from the totals), or of everyone."""
+    conn = get_db()
+    if not user_id:
+        conn.execute('DELETE FROM user_stats')
+        conn.execute('DELETE FROM user_daily_stats')
+        return
+
+    row = conn.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
+    if row:
+        conn.execute(
+            f"UPDATE user_stats SET {', '.join(f'{c} = {c} - ?' for c in STATS_COLUMNS)} WHERE user_id = ?",
+            tuple(row[c] for c in STATS_COLUMNS) + (ALL_USERS,)
+        )
+    for day in conn.execute('SELECT day, count FROM user_daily_stats WHERE user_id = ?', (user_id,)).fetchall():
+        conn.execute('UPDATE user_daily_stats SET count = count - ? WHERE user_id = ? AND day = ?',
+                     (day['count'], ALL_USERS, day['day']))
+    conn.execute('DELETE FROM user_stats WHERE user_id = ?', (user_id,))
+    conn.execute('DELETE FROM user_daily_stats WHERE user_id = ?', (user_id,))
+
+
+def rebuild_stats(history=None) -> Dict:
+    """Recompute all aggregates from the stored scripts and report rows that had drifted."""
+    history = history or get_history()
+    totals = {}
+    daily = {}
+    for script in history.iter_meta():
+        script = dict(script)
+        delta = _stats_delta(script, 1)
+        day = (script.get('timestamp') or '')[:10]
+        for key in (script.get('user_id') or '', ALL_USERS):
+            current = totals.get(key, (0, 0, 0, 0, 0))
+            totals[key] = tuple(a + b for a, b in zip(current, delta))
+            daily[(key, day)] = daily.get((key, day), 0) + 1
+
+    conn = get_db()
+    with conn:
+        previous = {row['user_id']: tuple(row[c] for c in STATS_COLUMNS)
+                    for row in conn.execute('SELECT * FROM user_stats')}
+        conn.execute('DELETE FROM user_stats')
+        conn.execute('DELETE FROM user_daily_stats')
+        conn.executemany(
+            f"INSERT INTO user_stats (user_id, {', '.join(STATS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            [(key,) + values for key, values in totals.items()]
+        )
+        conn.executemany(
+            'INSERT INTO user_daily_stats (user_id, day, count) VALUES (?, ?, ?)',
+            [(key, day, count) for (key, day), count in daily.items()]
+        )
+        if ALL_USERS not in totals:
+            conn.execute('INSERT INTO user_stats (user_id) VALUES (?)', (ALL_USERS,))
+
+    drifted = sorted(key for key in set(previous) | set(totals)
+                     if previous.get(key, (0,) * 5) != totals.get(key, (0,) * 5))
+    return {'users': len(totals), 'drifted': drifted}
+
+
 def get_stats(user_id: str = None) -> Dict:
     """Get usage statistics, optionally filtered by user."""
-    ensure_data_dir()
-    
-    with open(DATA_FILE, 'r') as f:
-        db = json.load(f)
-    
-    scripts = db.get('scripts', [])
-    
-    # Filter by user if specified
-    if user_id:
-        scripts = [s for s in scripts if s.get('user_id') == user_id]
-    
+    history = get_history()
+    conn = get_db()
+    key = user_id or ALL_USERS
+    row = conn.execute('SELECT * FROM user_stats WHERE user_id = ?', (key,)).fetchone()
+    totals = dict(row) if row else dict.fromkeys(STATS_COLUMNS, 0)
+
     # Calculate statistics
     stats = {
-        'total_scripts': len(scripts),
-        'total_videos': len(scripts),
+        'total_scripts': totals['total'],
+        'total_videos': totals['total'],
         'avg_transcription_length': 0,
         'avg_script_length': 0,
-        'instagram_count': 0,
-        'upload_count': 0,
+        'instagram_count': totals['instagram_count'],
+        'upload_count': totals['upload_count'],
+        'recent_count': 0,
         'recent_activity': []
     }
-    
-    if scripts:
-        stats['avg_transcription_length'] = sum(s.get('transcription_length', 0) for s in scripts) // len(scripts)
-        stats['avg_script_length'] = sum(s.get('script_length', 0) for s in scripts) // len(scripts)
-        stats['instagram_count'] = sum(1 for s in scripts if s.get('source_type') == 'instagram')
-        stats['upload_count'] = sum(1 for s in scripts if s.get('source_type') == 'upload')
-        
-        # Recent activity (last 7 days)
-        from datetime import timedelta
-        week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        stats['recent_activity'] = [s for s in scripts if s.get('timestamp', '') >= week_ago]
-    
+
+    if totals['total']:
+        stats['avg_transcription_length'] = totals['transcription_sum'] // totals['total']
+        stats['avg_script_length'] = totals['script_sum'] // totals['total']
+
+        # Recent activity (last 7 days): count from the per-day buckets,
+        # plus the latest few entries for the timeline
+        week_ago = datetime.now() - timedelta(days=7)
+        stats['recent_count'] = conn.execute(
+            'SELECT COALESCE(SUM(count), 0) FROM user_daily_stats WHERE user_id = ? AND day >= ?',
+            (key, week_ago.date().isoformat())
+        ).fetchone()[0]
+        if stats['recent_count']:
+            recent = history.page(user_id, 'newest', limit=RECENT_ACTIVITY_LIMIT)
+            stats['recent_activity'] = [s for s in recent if s['timestamp'] >= week_ago.isoformat()]
+
     return stats
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] == ['rebuild-stats']:
+        result = rebuild_stats()
+        print(f"Rebuilt stats for {result['users']} users")
+        if result['drifted']:
+            print(f"Drift found for: {', '.join(result['drifted'])}")
+        else:
+            print("No drift found")
+    else:
+        print("Usage: python data_store.py rebuild-stats")
@@ -0,0 +1,295 @@
+"""
+Append-only history log (HISTORY_BACKEND=log)
+Saves append one JSON line and deletes append a tombstone, so the cost of a
+write depends on the record size, not on the size of the history. An
+in-memory index maps each script id to the byte offset of its record.
+Several processes may share the log (the reloader's parent and child, the
+data_store CLI next to a live server): every operation holds an flock on
+data/history.log.lock and first catches up with records other processes
+appended, or reloads after another process compacted the file.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single process only
+    fcntl = None
+
+from data_store import get_db, make_summary, PAGE_SORTS, DEFAULT_PAGE_SIZE, SUMMARY_COLUMNS
+
+LOG_FILE = 'data/history.log'
+
+# Rewrite the log once at least this many records are dead and they make up
+# more than COMPACT_DEAD_RATIO of the file
+COMPACT_MIN_DEAD = 1000
+COMPACT_DEAD_RATIO = 0.5
+
+
+def _encode(record: Dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _meta(script: Dict, offset: int) -> Dict:
+    """Index entry for a script: where its record lives plus its summary for list views."""
+    meta = make_summary(script)
+    meta['offset'] = offset
+    return meta
+
+
+class LogHistory:
+    """Script history kept in an append-only newline-delimited JSON log.
+
+    Summaries live in the in-memory index, so list views never touch the file.
+    """
+
+    def __init__(self, path: str = LOG_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_file = open(path + '.lock', 'a')
+        self._flock_depth = 0
+        self._index = {}
+        self._user_counts = {}
+        self._records = 0
+        self._size = 0
+        self._writer = None
+        self._reader = None
+
+        with self._locked(exclusive=True):
+            if not os.path.exists(path):
+                self._seed_from_database()
+            self._open()
+
+    # ---------- cross-process locking ----------
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """Hold the thread lock and the file lock, with the index caught up with the file.
+
+        Reads take a shared lock and writes an exclusive one; nested calls reuse
+        the outer lock, so an operation that writes must start exclusive.
+        """
+        with self._lock:
+            outer = self._flock_depth == 0
+            if outer and fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._flock_depth += 1
+            try:
+                if outer and self._reader:
+                    self._sync(exclusive)
+                yield
+            finally:
+                self._flock_depth -= 1
+                if outer and fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync(self, exclusive: bool):
+        """Pick up changes made by other processes since this one last looked."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != os.fstat(self._reader.fileno()).st_ino or stat.st_size < self._size:
+            # Compacted (replaced) by another process
+            self._close()
+            self._open(exclusive)
+        elif stat.st_size > self._size:
+            self._scan(self._size, exclusive)
+
+    def _open(self, exclusive: bool = True):
+        self._index = {}
+        self._user_counts = {}
+        self._records = 0
+        self._size = 0
+        self._scan(0, exclusive)
+        self._writer = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+
+    def _close(self):
+        self._writer.close()
+        self._reader.close()
+
+    # ---------- loading & compaction ----------
+
+    def _seed_from_database(self):
+        """Start the log from the scripts already stored in the SQLite table."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for row in get_db().execute('SELECT * FROM scripts ORDER BY timestamp, id'):
+                f.write(_encode({'op': 'put', 'script': dict(row)}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _scan(self, offset: int, exclusive: bool):
+        """Apply the records from `offset` to the end of the log to the index."""
+        with open(self.path, 'rb+' if exclusive else 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write from a crash: drop the partial record (only
+                    # with the exclusive lock, when no other writer can be active)
+                    if exclusive:
+                        f.truncate(offset)
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if record and record.get('op') == 'put':
+                    self._index_put(record['script'], offset)
+                elif record and record.get('op') == 'del':
+                    self._index_delete(record['id'])
+                offset += len(line)
+                self._records += 1
+        self._size = offset
+
+    def _index_put(self, script: Dict, offset: int):
+        self._index_delete(script['id'])
+        self._index[script['id']] = _meta(script, offset)
+        user_id = script.get('user_id')
+        self._user_counts[user_id] = self._user_counts.get(user_id, 0) + 1
+
+    def _index_delete(self, script_id: str) -> Dict:
+        meta = self._index.pop(script_id, None)
+        if meta:
+            user_id = meta['user_id']
+            self._user_counts[user_id] -= 1
+            if not self._user_counts[user_id]:
+                del self._user_counts[user_id]
+        return meta
+
+    def _dead_records(self) -> int:
+        return self._records - len(self._index)
+
+    def _maybe_compact(self):
+        dead = self._dead_records()
+        if dead >= COMPACT_MIN_DEAD and dead > self._records * COMPACT_DEAD_RATIO:
+            self.compact()
+
+    def compact(self) -> int:
+        """Rewrite the log with only live records. Returns the number of records dropped."""
+        with self._locked(exclusive=True):
+            dropped = self._dead_records()
+            tmp_path = self.path + '.compact'
+            live = sorted(self._index.items(), key=lambda item: item[1]['offset'])
+            with open(tmp_path, 'wb') as f:
+                for script_id, meta in live:
+                    self._reader.seek(meta['offset'])
+                    f.write(self._reader.readline())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._close()
+            os.replace(tmp_path, self.path)
+            self._open()
+            return dropped
+
+    # ---------- record I/O ----------
+
+    def _append(self, record: Dict) -> int:
+        data = _encode(record)
+        offset = self._size
+        self._writer.write(data)
+        self._writer.flush()
+        self._size += len(data)
+        self._records += 1
+        return offset
+
+    def _read(self, meta: Dict) -> Dict:
+        self._reader.seek(meta['offset'])
+        return json.loads(self._reader.readline())['script']
+
+    # ---------- history backend interface ----------
+
+    def insert(self, entry: Dict):
+        with self._locked(exclusive=True):
+            offset = self._append({'op': 'put', 'script': entry})
+            self._index_put(entry, offset)
+            # Replacing an existing id leaves its old record dead
+            self._maybe_compact()
+
+    def get(self, script_id: str) -> Dict:
+        with self._locked():
+            meta = self._index.get(script_id)
+            return self._read(meta) if meta else None
+
+    def delete(self, script_id: str) -> Dict:
+        with self._locked(exclusive=True):
+            meta = self._index.get(script_id)
+            if not meta:
+                return None
+            entry = self._read(meta)
+            self._append({'op': 'del', 'id': script_id})
+            self._index_delete(script_id)
+            self._maybe_compact()
+            return entry
+
+    def _select(self, user_id: str = None) -> List:
+        """Index entries of one user (or everyone), newest first."""
+        matches = [
+            (meta['timestamp'], script_id, meta) for script_id, meta in self._index.items()
+            if not user_id or meta['user_id'] == user_id
+        ]
+        matches.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return matches
+
+    def iter_scripts(self, user_id: str = None, since: str = None, until: str = None) -> Iterator[Dict]:
+        # Only the matching ids are snapshotted; each record is read (and
+        # re-checked against the index) as it is consumed
+        with self._locked():
+            script_ids = [
+                script_id for timestamp, script_id, _ in self._select(user_id)
+                if (not since or timestamp >= since) and (not until or timestamp <= until)
+            ]
+        for script_id in script_ids:
+            script = self.get(script_id)
+            if script:
+                yield script
+
+    def page(self, user_id: str, sort: str, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE,
+             source_type: str = None) -> List[Dict]:
+        column, direction = PAGE_SORTS[sort]
+        descending = direction == 'DESC'
+        with self._locked():
+            matches = [
+                ((meta[column], script_id), meta) for script_id, meta in self._index.items()
+                if (not user_id or meta['user_id'] == user_id)
+                and (not source_type or meta['source_type'] == source_type)
+            ]
+            if after:
+                after = tuple(after)
+                matches = [m for m in matches if (m[0] < after if descending else m[0] > after)]
+            matches.sort(key=lambda m: m[0], reverse=descending)
+            return [{c: meta[c] for c in SUMMARY_COLUMNS} for _, meta in matches[:limit]]
+
+    def has_scripts(self, user_id: str) -> bool:
+        with self._locked():
+            return user_id in self._user_counts
+
+    def clear(self, user_id: str = None) -> int:
+        with self._locked(exclusive=True):
+            script_ids = [script_id for script_id, meta in self._index.items()
+                          if not user_id or meta['user_id'] == user_id]
+            for script_id in script_ids:
+                self._append({'op': 'del', 'id': script_id})
+                self._index_delete(script_id)
+            self._maybe_compact()
+            return len(script_ids)
+
+    def get_many(self, script_ids: List[str]) -> Dict:
+        with self._locked():
+            return {script_id: self._read(self._index[script_id])
+                    for script_id in script_ids if script_id in self._index}
+
+    def put(self, entry: Dict):
+        # A newer put for the same id supersedes the old record
+        self.insert(entry)
+
+    def iter_meta(self):
+        with self._locked():
+            metas = list(self._index.values())
+        yield from metas
@@ -0,0 +1,298 @@
+"""
+Single-pass HTML extraction for brand pages
+Walks the markup once with an event-based parser (lxml when installed,
+otherwise the standard library's html.parser) and collects everything the
+scraper's summary needs: title, meta/Open Graph tags, JSON-LD, headings and
+text blocks scored by how likely they are to be main content. No tree is
+built, so the cost stays linear in the size of the page.
+"""
+import json
+from html.parser import HTMLParser
+from typing import Dict, List
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Subtrees left out of content, headings and about text
+SKIP_TAGS = {'nav', 'footer', 'header', 'aside', 'iframe', 'form', 'button'}
+# Elements whose text is never visible
+RAW_TAGS = {'script', 'style', 'noscript', 'template'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+# Tags that start a new text block
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'div', 'dl', 'dt',
+              'figcaption', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+              'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'}
+HEADING_TAGS = ('h1', 'h2', 'h3')
+# class/id fragments that mark a main-content container
+CONTENT_HINTS = ('content', 'main', 'article', 'post', 'entry', 'primary')
+SPA_MARKERS = ('react', 'vue', 'angular', 'next.js', 'nuxt')
+ABOUT_KEYWORDS = ('about', 'company', 'who we are', 'our story', 'mission')
+
+HEADINGS_PER_LEVEL = 5
+CONTENT_LIMIT = 2000
+MIN_BLOCK_SCORE = 50
+
+
+def _clean(parts: List[str]) -> str:
+    return ' '.join(''.join(parts).split())
+
+
+class _PageHandler:
+    """Parser event sink (lxml target interface) that gathers the page summary data."""
+
+    def __init__(self):
+        self.stack = []          # open elements: (tag, is_skip, is_hint, is_block)
+        self.skip_depth = 0
+        self.hint_depth = 0
+        self.link_depth = 0
+        self.raw = None          # (tag, type attribute, text parts) while inside script/style
+        self.title_parts = None
+        self.title = None
+        self.first_h1 = None
+        self.h1_parts = None
+        self.heading = None      # (tag, text parts) for the heading being read
+        self.headings = {tag: [] for tag in HEADING_TAGS}
+        self.meta = {}
+        self.json_ld = []
+        self.spa_marker = False
+        self.blocks = []
+        self.run_parts = []
+        self.run_link_chars = 0
+        self.run_tag = None
+        self.text_parts = []
+
+    # ---------- text blocks ----------
+
+    def _nearest_block(self) -> str:
+        for tag, _, _, is_block in reversed(self.stack):
+            if is_block:
+                return tag
+        return 'body'
+
+    def _flush_run(self):
+        if self.run_parts:
+            text = _clean(self.run_parts)
+            if text:
+                self.blocks.append({
+                    'tag': self.run_tag,
+                    'text': text,
+                    'hinted': self.hint_depth > 0,
+                    'link_ratio': min(self.run_link_chars / len(text), 1.0)
+                })
+        self.run_parts = []
+        self.run_link_chars = 0
+        self.run_tag = None
+
+    # ---------- parser events ----------
+
+    def start(self, tag, attrs):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag == 'meta':
+            key = attrs.get('name') or attrs.get('property')
+            if key and attrs.get('content'):
+                self.meta.setdefault(key.lower(), attrs['content'])
+            return
+        if tag in VOID_TAGS:
+            if tag == 'br':
+                self.data(' ')
+            return
+
+        if tag in RAW_TAGS:
+            if tag == 'script' and any(m in (attrs.get('src') or '').lower() for m in SPA_MARKERS):
+                self.spa_marker = True
+            self.raw = (tag, (attrs.get('type') or '').lower(), [])
+        elif tag == 'title' and self.title is None:
+            self.title_parts = []
+
+        is_block = tag in BLOCK_TAGS
+        if is_block:
+            self._flush_run()
+            self.text_parts.append(' ')
+        is_skip = tag in SKIP_TAGS
+        marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}".lower()
+        is_hint = tag in ('main', 'article') or (tag in ('div', 'section') and any(h in marker for h in CONTENT_HINTS))
+        self.stack.append((tag, is_skip, is_hint, is_block))
+        self.skip_depth += is_skip
+        self.hint_depth += is_hint
+        if tag == 'a':
+            self.link_depth += 1
+        if tag in HEADING_TAGS and not self.skip_depth and self.heading is None:
+            self.heading = (tag, [])
+        if tag == 'h1' and self.first_h1 is None and self.h1_parts is None:
+            self.h1_parts = []
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag in VOID_TAGS or not any(open_tag == tag for open_tag, _, _, _ in self.stack):
+            return
+        # Pop up to and including the matching element (closes unclosed children too)
+        while self.stack:
+            open_tag, is_skip, is_hint, is_block = self.stack[-1]
+            if is_block:
+                self._flush_run()
+                self.text_parts.append(' ')
+            self.stack.pop()
+            self.skip_depth -= is_skip
+            self.hint_depth -= is_hint
+            self._close(open_tag)
+            if open_tag == tag:
+                break
+
+    def _close(self, tag):
+        if tag == 'a':
+            self.link_depth = max(self.link_depth - 1, 0)
+        elif tag in RAW_TAGS and self.raw:
+            raw_tag, raw_type, parts = self.raw
+            self.raw = None
+            if raw_tag == 'script':
+                text = ''.join(parts)
+                if 'ld+json' in raw_type:
+                    self.json_ld.append(text)
+                if any(m in text.lower() for m in SPA_MARKERS):
+                    self.spa_marker = True
+        elif tag == 'title' and self.title_parts is not None:
+            self.title = _clean(self.title_parts)
+            self.title_parts = None
+        if self.heading and self.heading[0] == tag:
+            text = _clean(self.heading[1])
+            level = self.headings[tag]
+            if len(text) > 3 and len(level) < HEADINGS_PER_LEVEL:
+                level.append(text)
+            self.heading = None
+        if tag == 'h1' and self.h1_parts is not None:
+            self.first_h1 = _clean(self.h1_parts) or None
+            self.h1_parts = None
+
+    def data(self, text):
+        if self.raw:
+            self.raw[2].append(text)
+            return
+        if self.title_parts is not None:
+            self.title_parts.append(text)
+            return
+        self.text_parts.append(text)
+        if self.h1_parts is not None:
+            self.h1_parts.append(text)
+        if self.heading:
+            self.heading[1].append(text)
+        if not self.skip_depth:
+            if self.run_tag is None:
+                self.run_tag = self._nearest_block()
+            self.run_parts.append(text)
+            if self.link_depth:
+                self.run_link_chars += len(text.strip())
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._flush_run()
+        return self
+
+
+class _StdlibParser(HTMLParser):
+    """Feeds html.parser events into a _PageHandler."""
+
+    def __init__(self, handler: _PageHandler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+
+    def handle_starttag(self, tag, attrs):
+        self.handler.start(tag, {k: v or '' for k, v in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handler.start(tag, {k: v or '' for k, v in attrs})
+        self.handler.end(tag)
+
+    def handle_endtag(self, tag):
+        self.handler.end(tag)
+
+    def handle_data(self, data):
+        self.handler.data(data)
+
+
+def _parse(html: str) -> _PageHandler:
+    if LXML_AVAILABLE:
+        try:
+            handler = _PageHandler()
+            parser = etree.HTMLParser(target=handler)
+            parser.feed(html)
+            return parser.close()
+        except Exception:
+            pass  # fall back to the standard library parser
+    handler = _PageHandler()
+    parser = _StdlibParser(handler)
+    parser.feed(html)
+    parser.close()
+    return handler.close()
+
+
+def _score(block: Dict) -> float:
+    """Higher for long, sentence-like, link-poor text inside content containers."""
+    text = block['text']
+    score = len(text) * (1 - block['link_ratio'])
+    score += 10 * (text.count(', ') + text.count('. '))
+    if block['tag'] == 'p':
+        score *= 1.3
+    if block['hinted']:
+        score *= 1.5
+    return score
+
+
+def _main_content(blocks: List[Dict], limit: int = CONTENT_LIMIT) -> str:
+    """Best-scoring blocks that fit in `limit` characters, in document order."""
+    scored = sorted(((_score(b), i) for i, b in enumerate(blocks)), reverse=True)
+    chosen = []
+    total = 0
+    for score, index in scored:
+        if score < MIN_BLOCK_SCORE or total >= limit:
+            break
+        chosen.append(index)
+        total += len(blocks[index]['text']) + 1
+    if not chosen:
+        return ' '.join(b['text'] for b in blocks)[:limit]
+    return ' '.join(blocks[i]['text'] for i in sorted(chosen))[:limit]
+
+
+def extract_page(html: str) -> Dict:
+    """Parse `html` once and return the pieces the brand summary is built from.
+
+    Keys: title, description, keywords, type, site_name, meta (all name/property
+    meta tags), json_ld (parsed objects), headings, content, about,
+    text_blocks (blocks over 50 chars), visible_text, text_length, is_spa.
+    """
+    page = _parse(html)
+    meta = page.meta
+
+    json_ld = []
+    for raw in page.json_ld:
+        try:
+            json_ld.append(json.loads(raw))
+        except ValueError:
+            continue
+
+    headings = [text for tag in HEADING_TAGS for text in page.headings[tag]][:HEADINGS_PER_LEVEL]
+    paragraphs = [b['text'] for b in page.blocks if b['tag'] == 'p'][:50]
+    about = [p for p in paragraphs if any(k in p.lower() for k in ABOUT_KEYWORDS)][:3]
+    visible_text = _clean(page.text_parts)
+
+    return {
+        'title': page.title or meta.get('og:title') or page.first_h1,
+        'description': meta.get('description') or meta.get('og:description') or meta.get('twitter:description'),
+        'keywords': meta.get('keywords'),
+        'type': meta.get('og:type'),
+        'site_name': meta.get('og:site_name'),
+        'meta': meta,
+        'json_ld': json_ld,
+        'headings': headings,
+        'content': _main_content(page.blocks),
+        'about': ' '.join(about),
+        'text_blocks': [b['text'] for b in page.blocks if len(b['text']) > 50 and not b['text'].startswith('JavaScript')],
+        'visible_text': visible_text,
+        'text_length': len(visible_text.replace(' ', '')),
+        'is_spa': page.spa_marker or len(visible_text) < 200,
+    }
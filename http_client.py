@@ -0,0 +1,231 @@
+"""
+Shared HTTP clients for outbound requests
+Website scraping runs on one httpx.AsyncClient driven by a background event
+loop thread, so every scrape and about-page probe in the process is
+multiplexed over the same connection pools (HTTP/2 when the h2 package is
+installed) without a thread per request. Synchronous code such as Flask views
+submits coroutines with run_http(). Groq API calls share a pooled sync client.
+Pages are fetched with fetch_page, which streams the body and stops at a byte
+budget and an overall deadline. Connection reuse is counted.
+"""
+import asyncio
+import codecs
+import concurrent.futures
+import os
+import re
+import threading
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connections open at once across all hosts, and idle ones kept alive for reuse
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', 20))
+
+# Most of a page body that is read (decompressed bytes), and the wall-clock cap on reading it
+FETCH_MAX_BYTES = int(os.getenv('SCRAPE_MAX_BYTES', 2 * 1024 * 1024))
+FETCH_DEADLINE = float(os.getenv('SCRAPE_FETCH_DEADLINE', 20))
+# Bytes looked at to reject binary files and pick the encoding
+SNIFF_BYTES = 4096
+
+# Leading bytes of formats that are never a web page (PDF, PNG, GIF, JPEG, ZIP, gzip, RIFF, MP4, WOFF)
+BINARY_SIGNATURES = (b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04', b'\x1f\x8b', b'RIFF',
+                     b'\x00\x00\x00', b'wOFF', b'wOF2')
+BINARY_MEDIA_TYPES = ('image/', 'audio/', 'video/', 'font/', 'application/pdf', 'application/zip',
+                      'application/octet-stream')
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'new_connections': 0, 'http2_responses': 0}
+_seen_streams = weakref.WeakSet()
+
+
+async def _count_response(response: httpx.Response):
+    """Response hook: a network stream not seen before means a newly opened connection."""
+    stream = response.extensions.get('network_stream')
+    with _stats_lock:
+        _stats['requests'] += 1
+        if response.http_version == 'HTTP/2':
+            _stats['http2_responses'] += 1
+        if stream is None or stream not in _seen_streams:
+            _stats['new_connections'] += 1
+            if stream is not None:
+                _seen_streams.add(stream)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE)
+
+
+_loop = None
+_client = None
+_api_client = None
+_init_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start the HTTP event loop thread on first use."""
+    global _loop
+    if _loop is None:
+        with _init_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='http-loop', daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_http(coro, timeout: float = None):
+    """Run `coro` on the HTTP event loop and block until it finishes.
+
+    For synchronous callers only; coroutines already on the loop await directly.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide async client. Only use it from coroutines on the HTTP loop."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, follow_redirects=True, limits=_limits(),
+                                    event_hooks={'response': [_count_response]})
+    return _client
+
+
+def get_api_client() -> httpx.Client:
+    """Pooled sync client (HTTP/2 when available) for SDKs that take one, like Groq."""
+    global _api_client
+    if _api_client is None:
+        with _init_lock:
+            if _api_client is None:
+                _api_client = httpx.Client(http2=HTTP2_AVAILABLE, limits=_limits(), timeout=httpx.Timeout(600, connect=10))
+    return _api_client
+
+
+def get_pool_stats() -> Dict:
+    """Requests sent, connections opened and how many requests reused a pooled connection."""
+    with _stats_lock:
+        stats = dict(_stats)
+    reused = max(stats['requests'] - stats['new_connections'], 0)
+    return {
+        'requests': stats['requests'],
+        'new_connections': stats['new_connections'],
+        'reused_connections': reused,
+        'reuse_ratio': round(reused / stats['requests'], 3) if stats['requests'] else 0.0,
+        'http2': HTTP2_AVAILABLE,
+        'http2_responses': stats['http2_responses'],
+        'max_connections': HTTP_MAX_CONNECTIONS,
+        'max_keepalive': HTTP_MAX_KEEPALIVE,
+    }
+
+
+def _known_encoding(name) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+
+
+def sniff_encoding(content_type: str, head: bytes) -> str:
+    """Pick the body encoding from the start of the body: BOM, then the header charset,
+    then a <meta charset> near the top, then UTF-8 if the bytes decode as it."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    if 'charset=' in content_type:
+        encoding = _known_encoding(content_type.split('charset=')[-1].split(';')[0].strip('"\' '))
+        if encoding:
+            return encoding
+    match = _META_CHARSET.search(head[:SNIFF_BYTES])
+    if match and _known_encoding(match.group(1)):
+        return _known_encoding(match.group(1))
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def looks_binary(content_type: str, head: bytes) -> bool:
+    """True when the declared type or the leading bytes are clearly not text."""
+    if any(head.startswith(bom) for bom, _ in BOMS):
+        return False
+    if content_type.startswith(BINARY_MEDIA_TYPES) and not head.lstrip()[:1] == b'<':
+        return True
+    return head.startswith(BINARY_SIGNATURES) or b'\x00' in head[:1024]
+
+
+class FetchedPage:
+    """Status, headers and the bounded, decoded body of a fetched page."""
+
+    def __init__(self, response: httpx.Response, body: bytes = b'', encoding: str = 'utf-8', truncated: bool = False):
+        self.status_code = response.status_code
+        self.url = str(response.url)
+        self.headers = response.headers
+        self.http_version = response.http_version
+        self.encoding = encoding
+        self.bytes_read = len(body)
+        self.truncated = truncated
+        self.text = body.decode(encoding, errors='replace')
+
+
+async def fetch_page(url: str, headers: Dict, timeout: float = 20, max_bytes: int = FETCH_MAX_BYTES,
+                     deadline: float = FETCH_DEADLINE) -> FetchedPage:
+    """GET `url` and read at most `max_bytes` of its body within `deadline` seconds.
+
+    The deadline covers the headers and the body: a body still arriving when
+    it passes comes back truncated, and a server that has not sent headers by
+    then raises httpx.ReadTimeout. The first SNIFF_BYTES are checked for
+    binary content (raises before reading any more) and used to pick the
+    encoding. Raises httpx.HTTPStatusError on 4xx/5xx; a 304 comes back with
+    an empty body.
+    """
+    response = None
+    body = bytearray()
+    checked = False
+    truncated = False
+    try:
+        async with asyncio.timeout(deadline):
+            # Leaving the block early closes the response: HTTP/1.1 drops the connection, HTTP/2 resets only the stream
+            async with get_client().stream('GET', url, headers=headers, timeout=timeout) as response:
+                if response.status_code == 304:
+                    return FetchedPage(response)
+                response.raise_for_status()
+                # Chunks are yielded as they arrive, so a slow body cannot hold the loop past the deadline
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if not checked and len(body) >= SNIFF_BYTES:
+                        _reject_binary(response, body)
+                        checked = True
+                    if len(body) >= max_bytes:
+                        del body[max_bytes:]
+                        truncated = True
+                        break
+    except TimeoutError:
+        if response is None:
+            raise httpx.ReadTimeout(f"No response from {url} within {deadline:g}s")
+        truncated = True
+    if not checked:
+        _reject_binary(response, body)
+    content_type = response.headers.get('Content-Type', '').lower()
+    return FetchedPage(response, bytes(body), sniff_encoding(content_type, bytes(body[:SNIFF_BYTES])), truncated)
+
+
+def _reject_binary(response: httpx.Response, body: bytearray):
+    if looks_binary(response.headers.get('Content-Type', '').lower(), bytes(body[:SNIFF_BYTES])):
+        raise Exception("URL does not point to a web page (got binary content)")
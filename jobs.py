@@ -0,0 +1,164 @@
+"""
+Background job queue for video processing
+Jobs run on a bounded thread pool so the HTTP request returns immediately;
+the current stage, per-stage timings and the result are polled through
+/api/jobs/<job_id> or streamed as events from /api/jobs/<job_id>/events.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class Job:
+    """A queued unit of work with its status, stage timings and result."""
+
+    def __init__(self, user_id: str = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = 'queued'
+        self.current_stage = None
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def _emit_locked(self, event: str, data):
+        self.events.append((len(self.events) + 1, event, data))
+        self._changed.notify_all()
+
+    def emit(self, event: str, data=None):
+        """Publish an event to everyone following the job (see iter_events)."""
+        with self._lock:
+            self._emit_locked(event, data)
+
+    def finish(self, status: str, result=None, error: str = None):
+        """Record the outcome and publish it as the final 'done' or 'failed' event."""
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.status = status
+            self.finished_at = time.time()
+            self.current_stage = None
+            self._emit_locked(status, result if status == 'done' else {'error': error})
+
+    def iter_events(self, after: int = 0, keepalive: float = 15):
+        """Yield (id, event, data) for events after id `after` until the job finishes.
+
+        Yields None when nothing happened for `keepalive` seconds.
+        """
+        while True:
+            with self._lock:
+                if len(self.events) <= after and not self.finished:
+                    self._changed.wait(keepalive)
+                pending = self.events[after:]
+                finished = self.finished
+            if not pending:
+                if finished:
+                    return
+                yield None
+                continue
+            yield from pending
+            after += len(pending)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark `name` as the current stage and record how long it takes."""
+        entry = {'name': name, 'started_at': time.time(), 'duration': None}
+        with self._lock:
+            self.current_stage = name
+            self.stages.append(entry)
+            self._emit_locked('stage', {'name': name})
+        try:
+            yield
+        finally:
+            entry['duration'] = round(time.time() - entry['started_at'], 3)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            stages = [dict(s) for s in self.stages]
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.current_stage,
+            'stages': stages,
+            'queued_seconds': round((self.started_at or time.time()) - self.created_at, 3),
+            'elapsed_seconds': round((self.finished_at or time.time()) - (self.started_at or time.time()), 3),
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Runs jobs on a fixed-size thread pool and keeps them around for polling."""
+
+    def __init__(self, workers: int = 4, max_pending: int = 50, ttl: int = 3600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, user_id: str = None, **kwargs) -> Job:
+        """Queue fn(job, *args, **kwargs); its return value becomes the job result."""
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise QueueFullError('Too many videos are being processed right now. Please try again shortly.')
+            job = Job(user_id)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.finish('done', result=fn(job, *args, **kwargs))
+        except Exception as e:
+            job.finish('failed', error=str(e))
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)."""
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def info(self) -> Dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'done': statuses.count('done'),
+            'failed': statuses.count('failed'),
+        }
@@ -0,0 +1,162 @@
+"""
+Audio extraction with ffmpeg
+Calls ffmpeg directly and keeps the extracted audio in memory, ready to be
+handed to the Whisper API as a (filename, bytes) tuple. Long media can be
+split at silences into overlapping chunks for parallel transcription.
+"""
+import os
+import re
+import subprocess
+
+# Whisper works at 16 kHz mono; Opus keeps speech small at low bitrates
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_BITRATE = '24k'
+OPUS_OUTPUT_ARGS = ['-ac', '1', '-ar', str(AUDIO_SAMPLE_RATE), '-c:a', 'libopus', '-b:a', AUDIO_BITRATE, '-f', 'ogg']
+
+# Copy AAC tracks as-is instead of re-encoding them (faster, but larger uploads)
+AUDIO_STREAM_COPY = os.getenv('AUDIO_STREAM_COPY', 'true').lower() == 'true'
+
+FFMPEG_TIMEOUT = 300
+
+# Long audio is split into chunks of about this many seconds, cut at the
+# latest silence within CHUNK_SEARCH_WINDOW seconds before each target point
+CHUNK_SECONDS = int(os.getenv('TRANSCRIBE_CHUNK_SECONDS', 120))
+CHUNK_SEARCH_WINDOW = 20
+# Neighbouring chunks share this much audio so no word is lost at a cut
+CHUNK_OVERLAP = 2.0
+SILENCE_NOISE = '-30dB'
+SILENCE_MIN_DURATION = 0.4
+
+
+def probe_audio_codec(video_path):
+    """Return the codec name of the first audio stream, or None if there is no audio."""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+         '-show_entries', 'stream=codec_name', '-of', 'csv=p=0', video_path],
+        capture_output=True, text=True, timeout=30
+    )
+    if result.returncode != 0:
+        raise Exception(f"ffprobe failed: {result.stderr.strip()}")
+    return result.stdout.strip() or None
+
+
+def probe_duration(path):
+    """Return the media duration in seconds.
+
+    None when ffprobe has no usable value (`N/A` for streamed or fragmented input).
+    """
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', path],
+        capture_output=True, text=True, timeout=30
+    )
+    if result.returncode != 0:
+        raise Exception(f"ffprobe failed: {result.stderr.strip()}")
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def detect_silences(path):
+    """Return (start, end) pairs of the silent stretches in the audio track."""
+    result = subprocess.run(
+        ['ffmpeg', '-nostdin', '-hide_banner', '-i', path, '-map', '0:a:0', '-vn',
+         '-af', f'silencedetect=noise={SILENCE_NOISE}:d={SILENCE_MIN_DURATION}', '-f', 'null', '-'],
+        capture_output=True, text=True, timeout=FFMPEG_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg silencedetect failed: {result.stderr.strip()[-500:]}")
+    starts = [float(v) for v in re.findall(r'silence_start: (-?[\d.]+)', result.stderr)]
+    ends = [float(v) for v in re.findall(r'silence_end: (-?[\d.]+)', result.stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(duration, silences, chunk_seconds=CHUNK_SECONDS,
+                search_window=CHUNK_SEARCH_WINDOW, overlap=CHUNK_OVERLAP):
+    """Split [0, duration] into (start, end) segments of about `chunk_seconds`.
+
+    Each cut is placed in the middle of the latest silence that overlaps the
+    `search_window` seconds before the target point, using only the part of
+    the silence inside that window (or at the target if there is none). Every
+    segment is widened by `overlap` seconds on both sides.
+    """
+    cuts = []
+    start = 0.0
+    # The last chunk may run up to search_window seconds long rather than leave a tiny tail
+    while duration - start > chunk_seconds + search_window:
+        target = start + chunk_seconds
+        window_start = target - search_window
+        candidates = [(max(s, window_start) + min(e, target)) / 2 for s, e in silences
+                      if s <= target and e >= window_start]
+        cut = max(candidates) if candidates else target
+        cuts.append(cut)
+        start = cut
+
+    bounds = [0.0] + cuts + [duration]
+    return [(max(a - overlap, 0.0), min(b + overlap, duration)) for a, b in zip(bounds, bounds[1:])]
+
+
+def _run_ffmpeg(input_args, output_args):
+    command = ['ffmpeg', '-nostdin', '-v', 'error'] + input_args + \
+              ['-map', '0:a:0', '-vn', '-sn', '-dn'] + output_args + ['pipe:1']
+    result = subprocess.run(command, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    if result.returncode != 0 or not result.stdout:
+        raise Exception(f"ffmpeg failed: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+    return result.stdout
+
+
+def extract_audio(video_path, stream_copy=AUDIO_STREAM_COPY):
+    """Extract the audio track with ffmpeg and return it in memory as (filename, bytes).
+
+    AAC sources are stream-copied into a fragmented M4A when `stream_copy` is
+    set; everything else is encoded to 16 kHz mono Opus. Output goes through
+    a pipe, so nothing is written to disk.
+    """
+    try:
+        codec = probe_audio_codec(video_path)
+        if not codec:
+            raise Exception("Video has no audio track")
+
+        if codec == 'aac' and stream_copy:
+            # Fragmented MP4 can be written to a non-seekable pipe
+            filename = 'audio.m4a'
+            output_args = ['-c:a', 'copy', '-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov']
+        else:
+            filename = 'audio.ogg'
+            output_args = OPUS_OUTPUT_ARGS
+
+        return filename, _run_ffmpeg(['-i', video_path], output_args)
+    except subprocess.TimeoutExpired:
+        raise Exception("Error extracting audio: ffmpeg timed out")
+    except FileNotFoundError:
+        raise Exception("Error extracting audio: ffmpeg not found. Install it from https://ffmpeg.org/download.html")
+    except Exception as e:
+        raise Exception(f"Error extracting audio: {str(e)}")
+
+
+def extract_audio_chunks(video_path, chunk_seconds=CHUNK_SECONDS):
+    """Extract the audio track as a list of (filename, bytes) chunks for parallel transcription.
+
+    Short media comes back as a single extract_audio() result; longer media is
+    cut at silences (see plan_chunks) and each overlapping segment is encoded
+    to Opus.
+    """
+    try:
+        # Unknown durations can't be planned, so they take the single extraction path
+        duration = probe_duration(video_path)
+        if duration is not None and duration > chunk_seconds + CHUNK_SEARCH_WINDOW:
+            segments = plan_chunks(duration, detect_silences(video_path), chunk_seconds)
+            return [
+                (f'audio_{index:03d}.ogg',
+                 _run_ffmpeg(['-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', video_path],
+                             OPUS_OUTPUT_ARGS))
+                for index, (start, end) in enumerate(segments)
+            ]
+    except subprocess.TimeoutExpired:
+        raise Exception("Error extracting audio: ffmpeg timed out")
+    except FileNotFoundError:
+        raise Exception("Error extracting audio: ffmpeg not found. Install it from https://ffmpeg.org/download.html")
+    except Exception as e:
+        raise Exception(f"Error extracting audio: {str(e)}")
+
+    return [extract_audio(video_path)]
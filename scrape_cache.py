@@ -0,0 +1,136 @@
+"""
+On-disk cache for /scrape-website
+Keeps the raw page and the extracted brand summary for each normalized URL,
+together with its ETag/Last-Modified validators. Fresh entries are served
+without any request; stale ones are revalidated with a conditional GET.
+Least recently used entries are evicted once the cache outgrows its size cap.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict
+
+SCRAPE_CACHE_DIR = 'data/scrape_cache'
+
+
+class ScrapeCache:
+    """One JSON file per URL; file mtimes double as the LRU clock."""
+
+    def __init__(self, path: str = SCRAPE_CACHE_DIR, ttl: int = 3600, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = None
+        self.counters = {'fresh_hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _file(self, url: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_sizes(self):
+        """Scan the cache directory once (caller holds the lock)."""
+        if self._sizes is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._sizes = {}
+            for name in os.listdir(self.path):
+                if name.endswith('.json'):
+                    self._sizes[os.path.join(self.path, name)] = os.path.getsize(os.path.join(self.path, name))
+
+    def count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def get(self, url: str) -> Dict:
+        """Return the cached entry for `url` (with an `is_fresh` flag), or None."""
+        path = self._file(url)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        entry['is_fresh'] = time.time() - entry.get('validated_at', 0) < self.ttl
+        return entry
+
+    def put(self, url: str, response, html: str, summary: str):
+        """Store a 200 response's body, validators and the summary built from it."""
+        entry = {
+            'url': url,
+            'fetched_url': response.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+            'html': html,
+            'summary': summary,
+            'fetched_at': time.time(),
+            'validated_at': time.time()
+        }
+        self._write(url, entry)
+        self.count('stores')
+
+    def revalidated(self, url: str, entry: Dict, response):
+        """Record a 304 for `entry`: restart its TTL and pick up refreshed validators."""
+        entry = {k: v for k, v in entry.items() if k != 'is_fresh'}
+        entry['validated_at'] = time.time()
+        entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+        entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+        self._write(url, entry)
+        self.count('revalidated')
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict:
+        """If-None-Match / If-Modified-Since headers for revalidating `entry`."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _write(self, url: str, entry: Dict):
+        path = self._file(url)
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            self._load_sizes()
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._sizes[path] = len(data)
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used files until the cache fits (caller holds the lock)."""
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.counters['evictions'] += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            self._load_sizes()
+            removed = len(self._sizes)
+            for path in self._sizes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._sizes = {}
+            return removed
+
+    def info(self) -> Dict:
+        with self._lock:
+            self._load_sizes()
+            return dict(self.counters, entries=len(self._sizes), bytes=sum(self._sizes.values()),
+                        max_bytes=self.max_bytes, ttl=self.ttl)
@@ -0,0 +1,71 @@
+"""
+Request coalescing for duplicate in-flight work
+When several requests ask for the same thing at once (a trending reel
+submitted by many users), only the first runs it; the others wait for that
+run and share its result or its error. Counts how many runs were avoided.
+"""
+import threading
+from typing import Callable, Dict, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """At most one run per key at a time; concurrent callers with the same key share it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counters = {'runs': 0, 'coalesced': 0, 'failed_runs': 0}
+
+    def do(self, key: str, fn: Callable, waiting: Callable = None) -> Tuple[object, bool]:
+        """Return (fn's result, shared), running `fn()` only if no call for `key` is in flight.
+
+        `shared` is True when another caller's run was reused. `waiting`, if
+        given, returns a context manager that is held while waiting on it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.counters['runs'] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.counters['coalesced'] += 1
+                leader = False
+
+        if not leader:
+            if waiting:
+                with waiting():
+                    call.done.wait()
+            else:
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.counters['failed_runs'] += 1
+            raise
+        finally:
+            # Later callers start a new run (or hit whatever cache fn filled)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def info(self) -> Dict:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls),
+                        waiting=sum(call.waiters for call in self._calls.values()))
@@ -43,6 +43,13 @@ async function copyToClipboard(text) {
     }
 }
 
+// Escape text for safe insertion into HTML
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text == null ? '' : String(text);
+    return div.innerHTML.replace(/"/g, '&quot;').replace(/'/g, '&#39;');
+}
+
 // Format file size
 function formatFileSize(bytes) {
     if (bytes === 0) return '0 Bytes';
@@ -1,4 +1,4 @@
-// Generate page JavaScript with real-time progress tracking
+// Generate page JavaScript with job-based progress tracking and streamed results
 
 const uploadForm = document.getElementById('uploadForm');
 const videoInput = document.getElementById('video');
@@ -190,8 +190,7 @@ uploadForm.addEventListener('submit', async (e) => {
     formData.append('brand_input', brandInput.value);
     formData.append('process_mode', currentMode);
     
-    // Simulate progress (since we don't have real WebSocket yet)
-    simulateProgress(currentMode);
+    updateProgress(1, 'active', instagramUrl ? 'Downloading...' : 'Uploading...');
     
     try {
         const response = await fetch('/process', {
@@ -201,15 +200,24 @@ uploadForm.addEventListener('submit', async (e) => {
         
         const data = await response.json();
         
-        if (response.ok && data.success) {
+        if (!response.ok || !data.success) {
+            hideProgressModal();
+            showError(data.error || 'An error occurred while processing your video.');
+            return;
+        }
+        
+        const job = await watchJob(data);
+        
+        if (job.status === 'done' && job.result.success) {
             updateProgress(5, 'completed', 'Done!');
             setTimeout(() => {
                 hideProgressModal();
-                displayResults(data);
-            }, 1000);
+                displayResults(job.result);
+            }, progressModal.classList.contains('active') ? 1000 : 0);
         } else {
             hideProgressModal();
-            showError(data.error || 'An error occurred while processing your video.');
+            hideAllSections();
+            showError(job.error || 'An error occurred while processing your video.');
         }
     } catch (error) {
         hideProgressModal();
@@ -219,34 +227,108 @@ uploadForm.addEventListener('submit', async (e) => {
     }
 });
 
-function simulateProgress(mode) {
-    updateProgress(1, 'active', 'Downloading...');
-    
-    setTimeout(() => {
-        updateProgress(1, 'completed');
-        updateProgress(2, 'active', 'Extracting audio...');
-    }, 2000);
-    
-    setTimeout(() => {
-        updateProgress(2, 'completed');
-        updateProgress(3, 'active', 'Transcribing with Whisper...');
-    }, 5000);
-    
-    // For transcription-only mode, stop here
-    if (mode === 'transcription') {
-        return;
+// Server-side job stages mapped to the progress steps in the modal
+const STAGE_STEPS = {
+    download: [1, 'Downloading...'],
+    extract_audio: [2, 'Extracting audio...'],
+    transcribe: [3, 'Transcribing with Whisper...'],
+    analyze: [4, 'Analyzing video style...'],
+    analyze_rewrite: [4, 'Analyzing style and writing your script...'],
+    rewrite: [5, 'Generating your script...'],
+    save: [5, 'Saving...']
+};
+
+// Mark the steps before a server-side stage as completed and the stage itself as active
+function showStage(stage) {
+    const current = STAGE_STEPS[stage];
+    if (current) {
+        for (let step = 1; step < current[0]; step++) {
+            updateProgress(step, 'completed');
+        }
+        updateProgress(current[0], 'active', current[1]);
+    }
+}
+
+// Poll the job status endpoint until the job finishes, updating the progress steps
+async function pollJob(statusUrl) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            return { status: 'failed', error: job.error };
+        }
+        
+        showStage(job.stage);
+        
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+// Show the results area as soon as the first LLM tokens arrive, so the
+// style analysis and script are written out while they are generated
+function startStreamingResults(transcription) {
+    hideProgressModal();
+    transcriptionContent.textContent = transcription || '';
+    styleContent.textContent = '';
+    scriptContent.textContent = '';
+    fullProcessResults.style.display = 'block';
+    resultsSection.classList.remove('hidden');
+    resultsSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// Follow the job's Server-Sent Events stream; falls back to polling without EventSource
+function watchJob(data) {
+    if (!window.EventSource || !data.events_url) {
+        return pollJob(data.status_url);
     }
     
-    // Full process continues with analysis
-    setTimeout(() => {
-        updateProgress(3, 'completed');
-        updateProgress(4, 'active', 'Analyzing video style...');
-    }, 30000);
-    
-    setTimeout(() => {
-        updateProgress(4, 'completed');
-        updateProgress(5, 'active', 'Generating your script...');
-    }, 45000);
+    return new Promise(resolve => {
+        const source = new EventSource(data.events_url);
+        let transcription = '';
+        let streaming = false;
+        let finished = false;
+        
+        const finish = job => {
+            finished = true;
+            source.close();
+            resolve(job);
+        };
+        
+        source.addEventListener('stage', e => {
+            if (!streaming) {
+                showStage(JSON.parse(e.data).name);
+            }
+        });
+        source.addEventListener('transcription', e => {
+            transcription = JSON.parse(e.data).text;
+        });
+        source.addEventListener('token', e => {
+            const token = JSON.parse(e.data);
+            if (!streaming) {
+                streaming = true;
+                startStreamingResults(transcription);
+            }
+            const target = token.field === 'style_analysis' ? styleContent : scriptContent;
+            target.textContent += token.text;
+        });
+        source.addEventListener('done', e => {
+            finish({ status: 'done', result: JSON.parse(e.data) });
+        });
+        source.addEventListener('failed', e => {
+            finish({ status: 'failed', error: JSON.parse(e.data).error });
+        });
+        source.onerror = () => {
+            // EventSource reconnects on its own (resuming from the last event id)
+            // unless the server refused the stream
+            if (!finished && source.readyState === EventSource.CLOSED) {
+                finished = true;
+                pollJob(data.status_url).then(resolve);
+            }
+        };
+    });
 }
 
 function displayResults(data) {
@@ -4,52 +4,111 @@ const searchInput = document.getElementById('searchInput');
 const filterSelect = document.getElementById('filterSelect');
 const sortSelect = document.getElementById('sortSelect');
 const libraryGrid = document.getElementById('libraryGrid');
+const loadMoreBtn = document.getElementById('loadMoreBtn');
+const libraryEmpty = document.getElementById('libraryEmpty');
 
-// Search functionality
+// Search only filters the scripts already loaded on the page
 if (searchInput) {
     searchInput.addEventListener('input', debounce(filterLibrary, 300));
 }
 
-// Filter and sort
+// Source filter and sort order are applied by the server
 if (filterSelect) {
-    filterSelect.addEventListener('change', filterLibrary);
+    filterSelect.addEventListener('change', () => loadLibrary(true));
 }
 
 if (sortSelect) {
-    sortSelect.addEventListener('change', sortLibrary);
+    sortSelect.addEventListener('change', () => loadLibrary(true));
+}
+
+if (loadMoreBtn) {
+    loadMoreBtn.addEventListener('click', () => loadLibrary(false));
 }
 
 function filterLibrary() {
     const searchTerm = searchInput.value.toLowerCase();
-    const filterType = filterSelect.value;
     const items = document.querySelectorAll('.library-item');
     
     items.forEach(item => {
-        const source = item.dataset.source;
         const text = item.textContent.toLowerCase();
-        
-        const matchesSearch = text.includes(searchTerm);
-        const matchesFilter = filterType === 'all' || source === filterType;
-        
-        item.style.display = (matchesSearch && matchesFilter) ? 'block' : 'none';
+        item.style.display = text.includes(searchTerm) ? 'block' : 'none';
     });
 }
 
-function sortLibrary() {
-    const sortType = sortSelect.value;
-    const items = Array.from(document.querySelectorAll('.library-item'));
+// Fetch a page from /api/scripts; reset=true starts over with the current filter/sort
+async function loadLibrary(reset) {
+    const params = new URLSearchParams({ sort: sortSelect.value });
+    if (filterSelect.value !== 'all') {
+        params.set('source_type', filterSelect.value);
+    }
+    if (!reset && loadMoreBtn.dataset.cursor) {
+        params.set('cursor', loadMoreBtn.dataset.cursor);
+    }
     
-    items.sort((a, b) => {
-        if (sortType === 'newest') {
-            return b.dataset.timestamp.localeCompare(a.dataset.timestamp);
-        } else if (sortType === 'oldest') {
-            return a.dataset.timestamp.localeCompare(b.dataset.timestamp);
-        } else if (sortType === 'longest') {
-            return parseInt(b.dataset.length) - parseInt(a.dataset.length);
+    loadMoreBtn.disabled = true;
+    try {
+        const response = await fetch(`/api/scripts?${params}`);
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to load scripts');
         }
-    });
+        
+        if (reset) {
+            libraryGrid.innerHTML = '';
+        }
+        libraryGrid.insertAdjacentHTML('beforeend', data.scripts.map(renderLibraryItem).join(''));
+        
+        loadMoreBtn.dataset.cursor = data.next_cursor || '';
+        loadMoreBtn.style.display = data.next_cursor ? '' : 'none';
+        libraryEmpty.style.display = libraryGrid.children.length ? 'none' : '';
+        
+        if (searchInput.value) {
+            filterLibrary();
+        }
+    } catch (error) {
+        showToast(error.message, 'error');
+    } finally {
+        loadMoreBtn.disabled = false;
+    }
+}
+
+// Same markup as the cards rendered in library.html
+function renderLibraryItem(script) {
+    const id = escapeHtml(script.id);
+    const isInstagram = script.source_type === 'instagram';
+    const brand = script.brand_input || '';
+    const preview = (script.preview || '').slice(0, 120);
     
-    items.forEach(item => libraryGrid.appendChild(item));
+    return `
+        <div class="library-item" data-source="${escapeHtml(script.source_type)}" data-timestamp="${escapeHtml(script.timestamp)}" data-length="${script.script_length}">
+            <div class="library-item-header">
+                <span class="library-badge ${isInstagram ? 'badge-instagram' : 'badge-upload'}">
+                    ${isInstagram ? '📱' : '📂'}
+                </span>
+                <div class="library-item-menu">
+                    <button class="menu-btn" onclick="toggleMenu(this)">⋮</button>
+                    <div class="menu-dropdown">
+                        <a href="/view/${id}">View</a>
+                        <a href="#" onclick="copyScript('${id}')">Copy</a>
+                        <a href="#" onclick="exportScript('${id}')">Export</a>
+                        <a href="#" onclick="deleteScript('${id}')">Delete</a>
+                    </div>
+                </div>
+            </div>
+            <div class="library-item-body">
+                <h3 class="library-title">${escapeHtml(brand.slice(0, 40))}${brand.length > 40 ? '...' : ''}</h3>
+                <p class="library-date">${escapeHtml((script.timestamp || '').slice(0, 19).replace('T', ' '))}</p>
+                <div class="library-stats">
+                    <span>📝 ${script.transcription_length} chars</span>
+                    <span>✨ ${script.script_length} chars</span>
+                </div>
+                <p class="library-preview">${escapeHtml(preview)}...</p>
+            </div>
+            <div class="library-item-footer">
+                <a href="/view/${id}" class="btn-view">View Full Script →</a>
+            </div>
+        </div>
+    `;
 }
 
 function toggleMenu(button) {
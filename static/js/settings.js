@@ -128,32 +128,32 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
-// Import file handler
+// Import file handler: the file is sent as-is and parsed on the server as it streams in
 document.getElementById('importFile').addEventListener('change', (e) => {
     const file = e.target.files[0];
     if (!file) return;
     
-    const reader = new FileReader();
-    reader.onload = (event) => {
-        try {
-            const data = JSON.parse(event.target.result);
-            
-            fetch('/api/import-data', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(data)
-            })
-            .then(response => {
-                if (response.ok) {
-                    showToast('Data imported successfully!', 'success');
-                    setTimeout(() => location.reload(), 1000);
-                } else {
-                    showToast('Failed to import data', 'error');
-                }
-            });
-        } catch (error) {
-            showToast('Invalid JSON file', 'error');
+    const name = file.name.toLowerCase();
+    const params = new URLSearchParams({
+        format: name.endsWith('.ndjson') || name.endsWith('.ndjson.gz') ? 'ndjson' : 'json'
+    });
+    if (name.endsWith('.gz')) {
+        params.set('gzip', '1');
+    }
+    
+    fetch(`/api/import-data?${params}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: file
+    })
+    .then(response => response.json().then(data => ({ ok: response.ok, data })))
+    .then(({ ok, data }) => {
+        if (ok) {
+            showToast(`Imported ${data.inserted} new, ${data.updated} updated, ${data.skipped} skipped`, 'success');
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.error || 'Failed to import data', 'error');
         }
-    };
-    reader.readAsText(file);
+    })
+    .catch(() => showToast('Failed to import data', 'error'));
 });
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Checks for the scraper's bounded page fetch against local servers that
+trickle their response.
+
+Usage: python test_http_client.py
+"""
+
+import socket
+import threading
+import time
+import unittest
+
+import httpx
+
+from http_client import fetch_page, run_http
+
+
+def start_server(handle):
+    """Serve each connection with `handle(conn)` on a background thread; returns the URL."""
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+
+    def serve():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return f"http://127.0.0.1:{server.getsockname()[1]}/"
+
+
+def trickle_body(conn):
+    """Headers at once, then 100 bytes of HTML per second."""
+    try:
+        conn.recv(65536)
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                     b"Content-Length: 100000\r\n\r\n")
+        conn.sendall(b'<html><body>')
+        for _ in range(1000):
+            time.sleep(1)
+            conn.sendall(b'<p>' + b'x' * 93 + b'</p>')
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def trickle_headers(conn):
+    """One header byte per second."""
+    try:
+        conn.recv(65536)
+        for byte in b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n":
+            time.sleep(1)
+            conn.sendall(bytes([byte]))
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+class FetchDeadlineTest(unittest.TestCase):
+    def test_slow_body_is_truncated_at_deadline(self):
+        url = start_server(trickle_body)
+        started = time.monotonic()
+        page = run_http(fetch_page(url, {}, timeout=20, deadline=2))
+        elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 3)
+        self.assertTrue(page.truncated)
+        self.assertEqual(page.status_code, 200)
+        self.assertTrue(page.text.startswith('<html><body><p>'))
+
+    def test_slow_headers_raise_timeout(self):
+        url = start_server(trickle_headers)
+        started = time.monotonic()
+        with self.assertRaises(httpx.TimeoutException):
+            run_http(fetch_page(url, {}, timeout=20, deadline=2))
+        self.assertLess(time.monotonic() - started, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,8 +21,7 @@ def check_imports():
     packages = {
         'flask': 'Flask',
         'groq': 'Groq API',
-        'dotenv': 'python-dotenv',
-        'moviepy.editor': 'MoviePy'
+        'dotenv': 'python-dotenv'
     }
     
     all_good = True
@@ -44,12 +43,20 @@ def check_ffmpeg():
                               capture_output=True, 
                               text=True,
                               timeout=5)
-        if result.returncode == 0:
-            version_line = result.stdout.split('\n')[0]
-            print(f"✓ FFmpeg - {version_line}")
-            return True
+        if result.returncode != 0:
+            print("✗ FFmpeg - found but not working (required for audio extraction)")
+            return False
+        version_line = result.stdout.split('\n')[0]
+        print(f"✓ FFmpeg - {version_line}")
+        
+        result = subprocess.run(['ffprobe', '-version'], capture_output=True, timeout=5)
+        if result.returncode != 0:
+            print("✗ FFprobe - found but not working (required for audio extraction)")
+            return False
+        print("✓ FFprobe - found")
+        return True
     except (FileNotFoundError, subprocess.TimeoutExpired):
-        print("✗ FFmpeg - NOT found (required for video processing)")
+        print("✗ FFmpeg/FFprobe - NOT found (required for audio extraction)")
         print("  Install: https://ffmpeg.org/download.html")
         return False
 